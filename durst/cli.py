@@ -1,3 +1,5 @@
+import sqlite3
+
 import click
 
 from durst.db import DurstDB
@@ -77,6 +79,7 @@ def cli(ctx: click.Context, db_file: str) -> None:
     Run without a subcommand to launch the interactive TUI.
     """
     ctx.obj = DurstDB(db_file=db_file)
+    ctx.call_on_close(ctx.obj.close)
     if ctx.invoked_subcommand is None:
         from durst.tui import DurstApp
 
@@ -209,16 +212,17 @@ def stock_add(
             raise click.ClickException(
                 f"Drink type not found: {name}. Add it with 'durst drink add'."
             )
-        parsed_items.append(
-            {"drink_type_id": drink_type_id, "cost_per_item": price, "quantity": qty}
-        )
+        parsed_items.append((drink_type_id, price, qty))
 
     if total_cost is None:
-        total_cost = sum(i["cost_per_item"] * i["quantity"] for i in parsed_items)
+        total_cost = sum(price * qty for _, price, qty in parsed_items)
 
-    order_id = db.stock_new_drinks(orderer_id, total_cost, parsed_items, verbose=False)
-    if order_id is None:
-        raise click.ClickException("Failed to record the stock order.")
+    try:
+        order_id = db.stock_new_drinks(
+            orderer_id, total_cost, parsed_items, verbose=False
+        )
+    except sqlite3.Error as e:
+        raise click.ClickException(f"Failed to record the stock order: {e}") from e
     click.echo(
         f"Order {order_id}: {orderer} stocked {len(parsed_items)} item(s) "
         f"for {fmt_money(total_cost)}"
@@ -296,19 +300,13 @@ def repay(db: DurstDB, payer: str, receiver: str, amount: float) -> None:
 @click.pass_obj
 def history(db: DurstDB, limit: int) -> None:
     """Show the most recent purchases."""
-    purchases = db.get_recent_purchases(limit=limit)
     echo_table(
         ["#", "User", "Drink", "Cost", "Date", "Ordered by"],
         [
-            (
-                p["purchase_id"],
-                p["user_name"],
-                p["drink_name"],
-                fmt_money(p["cost"]),
-                p["purchase_date"],
-                p["orderer_name"],
+            (purchase_id, user, drink, fmt_money(cost), date, orderer)
+            for purchase_id, user, drink, cost, date, orderer in (
+                db.iter_recent_purchases(limit=limit)
             )
-            for p in purchases
         ],
     )
 
@@ -316,7 +314,7 @@ def history(db: DurstDB, limit: int) -> None:
 @cli.command()
 @click.pass_obj
 def debts(db: DurstDB) -> None:
-    """Show who owes money to whom (gross purchase totals, repayments not deducted)."""
+    """Show who owes money to whom, net of repayments."""
     rows = db.get_user_debts()
     echo_table(
         ["Debtor", "Creditor", "Owed"],
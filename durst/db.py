@@ -1,35 +1,315 @@
+import asyncio
+import logging
+import os
+import queue
 import sqlite3
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
 from sqlite3 import Error
-from typing import Any
+from typing import Any, Final, TypeVar
 
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr, computed_field
 
 DB_FILE = "sqlite.db"
 
+# Status messages of the write methods go to this logger instead of stdout.
+logger = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# Maximum number of pooled reader connections kept open per DurstDB
+# instance, one per core but at least a few, since readers also overlap
+# while waiting on I/O. Writes always go through a single writer connection.
+READ_POOL_SIZE = max(os.cpu_count() or 1, 4)
+
+# Size of the per-connection prepared statement cache. Statements below are
+# module-level Final constants so every call passes the exact same SQL text
+# and hits the cache instead of being re-parsed.
+STATEMENT_CACHE_SIZE = 256
+
+# Rows per multi-row stock_batches INSERT. At six parameters per row this
+# stays well below SQLite's bound-parameter limit, and full chunks share one
+# cached statement.
+BATCH_INSERT_CHUNK = 500
+
+# How long a connection waits for another process's lock before raising
+# "database is locked" (sets SQLite's busy_timeout).
+BUSY_TIMEOUT = 5.0
+
+# Upper bound in bytes for memory-mapped database I/O (256 MiB).
+MMAP_SIZE = 256 * 1024 * 1024
+
+# Version of the schema created by DurstDB.setup_database, stored in the
+# database header as PRAGMA user_version. Bump it whenever the DDL or a
+# migration in _create_schema changes so existing files are upgraded.
+SCHEMA_VERSION = 1
+
+
+#################################
+#        SQL Statements         #
+#################################
+# Point selects used by the frequently called getters. User names are not
+# unique; a name shared by several users resolves to the oldest one.
+_SQL_USER_BY_ID: Final = (
+    "SELECT user_id, name, email, balance_cents FROM users WHERE user_id = ?"
+)
+_SQL_USER_BY_NAME: Final = (
+    "SELECT user_id, name, email, balance_cents FROM users WHERE name = ? "
+    "ORDER BY user_id LIMIT 1"
+)
+_SQL_USER_BY_EMAIL: Final = (
+    "SELECT user_id, name, email, balance_cents FROM users WHERE email = ?"
+)
+_SQL_ALL_USERS: Final = (
+    "SELECT user_id, name, email, balance_cents FROM users ORDER BY name"
+)
+_SQL_USER_ID_BY_NAME: Final = (
+    "SELECT user_id FROM users WHERE name = ? ORDER BY user_id LIMIT 1"
+)
+_SQL_USER_BALANCE: Final = "SELECT balance_cents FROM users WHERE user_id = ?"
+_SQL_DRINK_TYPE_BY_ID: Final = (
+    "SELECT drink_type_id, name, brand FROM drink_types WHERE drink_type_id = ?"
+)
+_SQL_DRINK_TYPE_BY_NAME: Final = (
+    "SELECT drink_type_id, name, brand FROM drink_types WHERE name = ?"
+)
+_SQL_ALL_DRINK_TYPES: Final = (
+    "SELECT drink_type_id, name, brand FROM drink_types ORDER BY name"
+)
+_SQL_DRINK_TYPE_ID_BY_NAME: Final = (
+    "SELECT drink_type_id FROM drink_types WHERE name = ?"
+)
+# Bulk name lookups; the placeholder list is filled in per call. Users are
+# read newest first, so the oldest user wins in the dict when names are shared.
+_SQL_USER_IDS_BY_NAMES: Final = (
+    "SELECT name, user_id FROM users WHERE name IN ({}) ORDER BY user_id DESC"
+)
+_SQL_USERS_BY_NAMES: Final = (
+    "SELECT user_id, name, email, balance_cents FROM users WHERE name IN ({}) "
+    "ORDER BY user_id DESC"
+)
+# Full name -> id maps for open_bulk. Users are read newest first so that,
+# as with _SQL_USER_ID_BY_NAME, the oldest user wins when names are shared.
+_SQL_ALL_USER_IDS: Final = "SELECT name, user_id FROM users ORDER BY user_id DESC"
+_SQL_ALL_DRINK_TYPE_IDS: Final = "SELECT name, drink_type_id FROM drink_types"
+_SQL_DRINK_TYPE_IDS_BY_NAMES: Final = (
+    "SELECT name, drink_type_id FROM drink_types WHERE name IN ({})"
+)
+# Inserts that return the new ID, or no row at all when the unique key is
+# already taken, so the common case needs no prior existence check.
+_SQL_INSERT_USER: Final = """
+    INSERT INTO users (name, email) VALUES (?, ?)
+    ON CONFLICT(email) DO NOTHING
+    RETURNING user_id
+"""
+_SQL_USER_ID_BY_EMAIL: Final = "SELECT user_id FROM users WHERE email = ?"
+_SQL_INSERT_DRINK_TYPE: Final = """
+    INSERT INTO drink_types (name, brand) VALUES (?, ?)
+    ON CONFLICT(name) DO NOTHING
+    RETURNING drink_type_id
+"""
+# Multi-row variants for bulk_seed, run with executemany. Existing emails and
+# drink names are skipped as in add_user/add_drink_type.
+_SQL_SEED_USER: Final = (
+    "INSERT INTO users (name, email) VALUES (?, ?) ON CONFLICT(email) DO NOTHING"
+)
+_SQL_SEED_DRINK_TYPE: Final = (
+    "INSERT INTO drink_types (name, brand) VALUES (?, ?) ON CONFLICT(name) DO NOTHING"
+)
+_SQL_INSERT_ORDER: Final = "INSERT INTO orders (orderer_id, total_cost) VALUES (?, ?)"
+# Multi-row insert; the VALUES list is filled in with one row group per batch.
+_SQL_INSERT_BATCHES: Final = """
+    INSERT INTO stock_batches
+        (drink_type_id, order_id, orderer_id, cost_per_item, initial_qty, remaining_qty)
+    VALUES {}
+"""
+_BATCH_ROW_PLACEHOLDERS: Final = "(?, ?, ?, ?, ?, ?)"
+# Records a purchase from the oldest batch of the drink that still has stock.
+# The trg_purchase_settle trigger then takes the item from the batch and
+# settles the balances, so a purchase is a single statement. No row is
+# returned when the user, the drink or the stock is missing.
+_SQL_INSERT_PURCHASE_BY_NAME: Final = """
+    WITH
+        p AS (SELECT user_id FROM users WHERE name = ? ORDER BY user_id LIMIT 1),
+        b AS (
+            SELECT batch_id, cost_per_item, orderer_id
+            FROM stock_batches
+            WHERE drink_type_id = (SELECT drink_type_id FROM drink_types WHERE name = ?)
+                AND remaining_qty > 0
+            ORDER BY date_added ASC
+            LIMIT 1
+        )
+    INSERT INTO drink_purchases (user_id, batch_id, cost, charged_to_orderer_id)
+    SELECT p.user_id, b.batch_id, b.cost_per_item, b.orderer_id FROM p, b
+    RETURNING purchase_id
+"""
+# Same pick with ids taken from the open_bulk maps. The user and drink type
+# rows are matched by primary key and must still carry the cached names, so a
+# renamed row inserts nothing instead of being charged under its old name.
+_SQL_INSERT_PURCHASE_BY_ID: Final = """
+    INSERT INTO drink_purchases (user_id, batch_id, cost, charged_to_orderer_id)
+    SELECT u.user_id, sb.batch_id, sb.cost_per_item, sb.orderer_id
+    FROM users u, drink_types d, stock_batches sb
+    WHERE u.user_id = ? AND u.name = ?
+        AND d.drink_type_id = ? AND d.name = ?
+        AND sb.drink_type_id = d.drink_type_id AND sb.remaining_qty > 0
+    ORDER BY sb.date_added ASC
+    LIMIT 1
+    RETURNING purchase_id
+"""
+# Resolves the purchaser and drink names in one round trip; either column is
+# NULL when the name is unknown. Used to explain a failed purchase.
+_SQL_RESOLVE_PURCHASE: Final = """
+    SELECT
+        (SELECT user_id FROM users WHERE name = ? ORDER BY user_id LIMIT 1),
+        (SELECT drink_type_id FROM drink_types WHERE name = ?)
+"""
+_SQL_USER_EXISTS: Final = "SELECT 1 FROM users WHERE user_id = ?"
+# The amount is rounded to cents in SQL, with the same ROUND() as the settle
+# trigger and the balance rebuild, so all three agree on half cents.
+_SQL_SETTLE_REPAYMENT: Final = """
+    UPDATE users
+    SET balance_cents = balance_cents
+        + CAST(ROUND(? * 100) AS INTEGER) * ((user_id = ?) - (user_id = ?))
+    WHERE user_id IN (?, ?)
+"""
+_SQL_INSERT_REPAYMENT: Final = (
+    "INSERT INTO repayments (payer_id, receiver_id, amount) VALUES (?, ?, ?)"
+)
+# Balance rebuild: every purchase credits the orderer and debits the buyer,
+# every repayment credits the payer and debits the receiver. The history is
+# aggregated once and joined onto users, instead of one subquery per user.
+# Balances are whole cents, so every amount is rounded to cents before summing.
+_SQL_RESET_BALANCES: Final = "UPDATE users SET balance_cents = 0"
+_SQL_RECOMPUTE_BALANCES: Final = """
+    WITH
+        deltas (user_id, delta) AS (
+            SELECT charged_to_orderer_id, cost FROM drink_purchases
+            UNION ALL SELECT user_id, -cost FROM drink_purchases
+            UNION ALL SELECT payer_id, amount FROM repayments
+            UNION ALL SELECT receiver_id, -amount FROM repayments
+        ),
+        totals AS (
+            SELECT user_id, SUM(CAST(ROUND(delta * 100) AS INTEGER)) AS balance_cents
+            FROM deltas
+            GROUP BY user_id
+        )
+    UPDATE users SET balance_cents = totals.balance_cents
+    FROM totals
+    WHERE totals.user_id = users.user_id
+"""
+# Reports
+# Copies purchases into purchase_log together with the names they refer to;
+# callers append the WHERE clause selecting the purchases to copy.
+_SQL_FILL_PURCHASE_LOG: Final = """
+    INSERT INTO purchase_log (
+        purchase_id, user_id, user_name, drink_type_id, drink_name,
+        cost, purchase_date, orderer_id, orderer_name
+    )
+    SELECT
+        dp.purchase_id, u.user_id, u.name, dt.drink_type_id, dt.name,
+        dp.cost, dp.purchase_date, orderer.user_id, orderer.name
+    FROM drink_purchases dp
+    JOIN users u ON dp.user_id = u.user_id
+    JOIN stock_batches sb ON dp.batch_id = sb.batch_id
+    JOIN drink_types dt ON sb.drink_type_id = dt.drink_type_id
+    JOIN users orderer ON dp.charged_to_orderer_id = orderer.user_id
+"""
+_SQL_RECENT_PURCHASES: Final = """
+    SELECT purchase_id, user_name, drink_name, cost, purchase_date, orderer_name
+    FROM purchase_log INDEXED BY idx_purchase_log_date
+    ORDER BY purchase_date DESC
+    LIMIT ?
+"""
+_SQL_STOCK_STATUS: Final = """
+    SELECT name as drink_name, brand, current_stock as total_remaining
+    FROM drink_types
+    ORDER BY name
+"""
+_SQL_SEED_CURRENT_STOCK: Final = """
+    UPDATE drink_types
+    SET current_stock = (
+        SELECT COALESCE(SUM(sb.remaining_qty), 0)
+        FROM stock_batches sb
+        WHERE sb.drink_type_id = drink_types.drink_type_id
+    )
+"""
+# Pairwise debts: a purchase from someone else's paid batch adds to what the
+# buyer owes the orderer, a repayment takes it off again. Amounts are rounded
+# to cents so pairs that were paid off exactly do not linger as float noise.
+_SQL_FILL_USER_BALANCES: Final = """
+    INSERT INTO user_balances (debtor_id, creditor_id, amount)
+    SELECT debtor_id, creditor_id, SUM(amount)
+    FROM (
+        SELECT user_id AS debtor_id, charged_to_orderer_id AS creditor_id,
+            cost AS amount
+        FROM drink_purchases
+        WHERE user_id <> charged_to_orderer_id AND cost > 0
+        UNION ALL SELECT payer_id, receiver_id, -amount FROM repayments
+    )
+    GROUP BY debtor_id, creditor_id
+"""
+# user_balances keeps one row per ordered pair, so the report nets both
+# directions of each pair of users: debts the other way round cancel out, and
+# an overpayment turns into a debt of the receiver towards the payer.
+_SQL_USER_DEBTS: Final = """
+    WITH net AS (
+        SELECT
+            MIN(debtor_id, creditor_id) as low_id,
+            MAX(debtor_id, creditor_id) as high_id,
+            SUM(CASE WHEN debtor_id < creditor_id THEN amount ELSE -amount END)
+                as amount
+        FROM user_balances
+        GROUP BY low_id, high_id
+    )
+    SELECT
+        debtor.name as debtor_name,
+        creditor.name as creditor_name,
+        ABS(net.amount) as amount_owed
+    FROM net
+    JOIN users debtor
+        ON debtor.user_id = CASE WHEN net.amount > 0 THEN low_id ELSE high_id END
+    JOIN users creditor
+        ON creditor.user_id = CASE WHEN net.amount > 0 THEN high_id ELSE low_id END
+    WHERE ROUND(ABS(net.amount), 2) > 0
+    ORDER BY amount_owed DESC
+"""
+
 
 #################################
 #       Domain Classes          #
 #################################
+# The from_db_row constructors use model_construct: rows come straight from
+# the typed schema, so pydantic validation would only repeat work per row.
 class User(BaseModel):
     """Represents a user in the system."""
 
     user_id: int | None = None
     name: str = ""
     email: str = ""
-    balance: float = 0.0
+    balance_cents: int = 0
+
+    @computed_field
+    @property
+    def balance(self) -> float:
+        """The balance in currency units, for display."""
+        return self.balance_cents / 100
 
     def is_in_debt(self) -> bool:
         """Check if user owes money."""
-        return self.balance < 0
+        return self.balance_cents < 0
 
     def is_owed(self) -> bool:
         """Check if user is owed money."""
-        return self.balance > 0
+        return self.balance_cents > 0
 
     @classmethod
     def from_db_row(cls, row: tuple) -> "User":
         """Create a User instance from a database row."""
-        return cls(user_id=row[0], name=row[1], email=row[2], balance=row[3])
+        return cls.model_construct(
+            user_id=row[0], name=row[1], email=row[2], balance_cents=row[3]
+        )
 
 
 class DrinkType(BaseModel):
@@ -42,7 +322,7 @@ class DrinkType(BaseModel):
     @classmethod
     def from_db_row(cls, row: tuple) -> "DrinkType":
         """Create a DrinkType instance from a database row."""
-        return cls(
+        return cls.model_construct(
             drink_type_id=row[0], name=row[1], brand=row[2] if len(row) > 2 else ""
         )
 
@@ -58,7 +338,7 @@ class Order(BaseModel):
     @classmethod
     def from_db_row(cls, row: tuple) -> "Order":
         """Create an Order instance from a database row."""
-        return cls(
+        return cls.model_construct(
             order_id=row[0], orderer_id=row[1], order_date=row[2], total_cost=row[3]
         )
 
@@ -82,7 +362,7 @@ class StockBatch(BaseModel):
     @classmethod
     def from_db_row(cls, row: tuple) -> "StockBatch":
         """Create a StockBatch instance from a database row."""
-        return cls(
+        return cls.model_construct(
             batch_id=row[0],
             drink_type_id=row[1],
             order_id=row[2],
@@ -107,7 +387,7 @@ class Purchase(BaseModel):
     @classmethod
     def from_db_row(cls, row: tuple) -> "Purchase":
         """Create a Purchase instance from a database row."""
-        return cls(
+        return cls.model_construct(
             purchase_id=row[0],
             user_id=row[1],
             batch_id=row[2],
@@ -129,7 +409,7 @@ class Repayment(BaseModel):
     @classmethod
     def from_db_row(cls, row: tuple) -> "Repayment":
         """Create a Repayment instance from a database row."""
-        return cls(
+        return cls.model_construct(
             repayment_id=row[0],
             payer_id=row[1],
             receiver_id=row[2],
@@ -138,6 +418,15 @@ class Repayment(BaseModel):
         )
 
 
+class DashboardSnapshot(BaseModel):
+    """All report data shown together on a dashboard, read at one point in time."""
+
+    recent_purchases: list[tuple] = []
+    stock: list[dict] = []
+    users: list[User] = []
+    debts: list[dict] = []
+
+
 #################################
 #     Database Manager Class    #
 #################################
@@ -150,15 +439,245 @@ class DurstDB(BaseModel):
 
     db_file: str = DB_FILE
 
+    _readers: queue.LifoQueue = PrivateAttr(default_factory=queue.LifoQueue)
+    _readers_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _readers_opened: int = PrivateAttr(default=0)
+    _writer: sqlite3.Connection | None = PrivateAttr(default=None)
+    _writer_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _local: threading.local = PrivateAttr(default_factory=threading.local)
+    # name -> id maps preloaded by open_bulk for add_purchase. Rows can be
+    # renamed, so a cached id is only used together with its name and dropped
+    # when the row no longer carries it.
+    _user_ids: dict[str, int] = PrivateAttr(default_factory=dict)
+    _drink_type_ids: dict[str, int] = PrivateAttr(default_factory=dict)
+
     def model_post_init(self, __context: Any) -> None:
         """
         Initialize the database manager.
         """
         self.setup_database()
 
-    def _get_connection(self) -> sqlite3.Connection:
-        """Get a database connection."""
-        return sqlite3.connect(self.db_file)
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        """Open a new connection and apply the per-connection PRAGMAs.
+
+        ``journal_mode`` is persisted in the database file by ``setup_database``;
+        the remaining PRAGMAs only live as long as the connection, so they are
+        applied when it is opened.
+
+        Args:
+            read_only (bool): Open a reader with ``query_only`` set, which
+                rejects any write on the connection. Defaults to False.
+        """
+        # Autocommit mode: reads never open a transaction, writes go
+        # through _transaction, which issues BEGIN/COMMIT explicitly.
+        con = sqlite3.connect(
+            self.db_file,
+            timeout=BUSY_TIMEOUT,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            isolation_level=None,
+        )
+        con.execute("PRAGMA synchronous=NORMAL")
+        con.execute("PRAGMA temp_store=MEMORY")
+        con.execute("PRAGMA cache_size=-64000")
+        con.execute("PRAGMA foreign_keys=ON")
+        # Serve reads from memory-mapped pages instead of read() syscalls.
+        con.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        if read_only:
+            con.execute("PRAGMA query_only=1")
+        return con
+
+    @contextmanager
+    def _pinned(self, con: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+        """Make ``con`` the connection nested checkouts in this thread reuse."""
+        outer = getattr(self._local, "con", None)
+        self._local.con = con
+        try:
+            yield con
+        finally:
+            self._local.con = outer
+
+    @contextmanager
+    def _read_conn(self, pin: bool = True) -> Iterator[sqlite3.Connection]:
+        """Check a reader connection out of the pool for the enclosed block.
+
+        Under WAL any number of readers run alongside the single writer. The
+        readers are opened lazily, up to READ_POOL_SIZE, with ``query_only``
+        set and are returned to the pool afterwards, so their page and
+        statement caches stay warm across calls. The pool is LIFO, so the most
+        recently used (hottest) connection is handed out first.
+
+        A read nested in another checkout in the same thread reuses the outer
+        connection; in particular, reads inside a transaction run on the
+        writer and see its uncommitted changes. Every connection to
+        ``:memory:`` is a separate database, so there all reads go to the
+        writer.
+
+        Args:
+            pin (bool): Let nested checkouts in this thread reuse the reader.
+                Generators pass False (see `_iter_rows`), since they are
+                suspended between rows and the caller's other calls must not
+                end up on their connection. Ignored for ``:memory:``, where
+                the writer is always pinned. Defaults to True.
+        """
+        con = getattr(self._local, "con", None)
+        if con is not None:
+            yield con
+            return
+        if self.db_file == ":memory:":
+            with self._write_conn() as con:
+                yield con
+            return
+
+        try:
+            con = self._readers.get_nowait()
+        except queue.Empty:
+            with self._readers_lock:
+                if self._readers_opened < READ_POOL_SIZE:
+                    self._readers_opened += 1
+                    con = self._connect(read_only=True)
+            if con is None:
+                # Every reader is in use; wait for one to be returned.
+                con = self._readers.get()
+
+        try:
+            if pin:
+                with self._pinned(con):
+                    yield con
+            else:
+                yield con
+        finally:
+            self._readers.put(con)
+
+    def _iter_rows(self, sql: str, params: tuple = ()) -> Iterator[Any]:
+        """Yield the rows of a read query, for the ``iter_*`` generators.
+
+        On a file the rows are streamed from a reader that is not pinned, so
+        the caller is free to make other calls between rows. On ``:memory:``
+        reads hold the writer lock, which must not stay taken while the
+        generator is suspended, so the rows are fetched up front and yielded
+        after the lock is released.
+        """
+        if self.db_file == ":memory:":
+            with self._read_conn() as con:
+                rows = con.execute(sql, params).fetchall()
+            yield from rows
+            return
+        with self._read_conn(pin=False) as con:
+            yield from con.execute(sql, params)
+
+    @contextmanager
+    def _write_conn(self) -> Iterator[sqlite3.Connection]:
+        """Hold the single writer connection for the enclosed block.
+
+        SQLite only allows one writer at a time, so writes are serialized on
+        one connection here instead of contending for the file lock. Nested
+        checkouts of the writer in the same thread reuse it.
+        """
+        if getattr(self._local, "con", None) is self._writer is not None:
+            yield self._writer
+            return
+
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = self._connect()
+            with self._pinned(self._writer) as con:
+                yield con
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run the enclosed block inside an explicit write transaction.
+
+        Commits when the block finishes and rolls back if it raises. When a
+        transaction is already open on the connection, the block runs in a
+        savepoint instead, so it can be undone without aborting the outer one.
+        """
+        with self._write_conn() as con:
+            if con.in_transaction:
+                con.execute("SAVEPOINT nested")
+                try:
+                    yield con
+                except BaseException:
+                    con.execute("ROLLBACK TO nested")
+                    con.execute("RELEASE nested")
+                    raise
+                con.execute("RELEASE nested")
+                return
+
+            # IMMEDIATE takes the write lock up front, so a transaction never
+            # has to upgrade from a read lock mid-way and fail with SQLITE_BUSY.
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                yield con
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+            con.execute("COMMIT")
+
+    def close(self) -> None:
+        """Close the pooled connections. New ones are opened on the next query."""
+        with self._readers_lock:
+            while True:
+                try:
+                    self._readers.get_nowait().close()
+                except queue.Empty:
+                    break
+                self._readers_opened -= 1
+        with self._writer_lock:
+            if self._writer is not None:
+                # Recommended before closing; keeps the statistics current.
+                self._writer.execute("PRAGMA optimize")
+                self._writer.close()
+                self._writer = None
+
+    @contextmanager
+    def bulk(self) -> Iterator[sqlite3.Connection]:
+        """Group the write calls made inside the block into one transaction.
+
+        Every write method in this thread (`add_user`, `add_drink_type`,
+        `stock_new_drinks`, `add_purchase`, `add_repayment`, ...) joins the
+        open transaction as a savepoint instead of committing on its own, so
+        a burst of calls pays for a single commit. If the block raises,
+        everything done inside it is rolled back.
+
+        Yields:
+            sqlite3.Connection: The writer connection, for raw statements.
+
+        Example:
+            >>> with db.bulk():
+            ...     alice = db.add_user("Alice", "alice@example.com")
+            ...     db.add_purchase("Alice", "Cola")
+        """
+        with self._transaction() as con:
+            yield con
+
+    @contextmanager
+    def open_bulk(self) -> Iterator["DurstDB"]:
+        """Preload every user and drink type name for a burst of name-based calls.
+
+        Inside the block, `add_purchase` inserts by the preloaded ids instead
+        of searching the name indexes. The rows must still carry the names, so
+        a user or drink type renamed during the block is resolved afresh, and
+        names added during the block are still found through the database. On
+        exit the maps go back to their previous contents, so a long-lived
+        manager neither keeps the full tables in memory nor holds on to ids
+        that may go stale.
+
+        Example:
+            >>> with db.open_bulk():
+            ...     for user, drink in rows:
+            ...         db.add_purchase(user, drink)
+        """
+        saved_user_ids = self._user_ids.copy()
+        saved_drink_type_ids = self._drink_type_ids.copy()
+        with self._read_conn() as con:
+            self._user_ids.update(con.execute(_SQL_ALL_USER_IDS))
+            self._drink_type_ids.update(con.execute(_SQL_ALL_DRINK_TYPE_IDS))
+        try:
+            yield self
+        finally:
+            self._user_ids = saved_user_ids
+            self._drink_type_ids = saved_drink_type_ids
 
     def setup_database(self):
         """
@@ -166,12 +685,21 @@ class DurstDB(BaseModel):
         This function opens (and creates if it does not exist) an SQLite database at the
         given path and ensures that the schema required by the application is present.
         It creates the following tables if they do not already exist:
-        - `users`: stores user records (id, name, unique email, balance).
-        - `drink_types`: catalog of drink types (id, unique name, price, stock).
+        - `users`: stores user records (id, name, unique email, balance in cents).
+        - `drink_types`: catalog of drink types (id, unique name, brand).
         - `orders`: aggregated orders placed by users; stores order metadata and items as JSON.
         - `drink_purchases`: individual purchase records (one row per purchased item).
         - `repayments`: records of repayments from one user to another.
-        The function commits any changes and closes the connection before returning.
+        - `purchase_log`: purchases denormalised with user and drink names.
+        - `user_balances`: net amount each user owes each other user.
+        It also creates the indexes used by name lookups and the batch pick in
+        `add_purchase`. Uniqueness of drink type names is enforced by a unique
+        index rather than a column constraint, so databases created before the
+        constraint existed are upgraded as well. User names are not unique and
+        only get a plain index.
+        All DDL runs in a single transaction that is committed before returning.
+        The transaction also records `SCHEMA_VERSION` in `PRAGMA user_version`,
+        so reopening a database that is already up to date skips the DDL.
 
         Raises:
             sqlite3.Error: If connecting to the database or executing any DDL statements
@@ -181,90 +709,332 @@ class DurstDB(BaseModel):
             >>> db = DurstDB("/path/to/app.db")
             # After initialization, the specified SQLite file will exist and contain the required tables.
         """
+        with self._write_conn() as con:
+            version = con.execute("PRAGMA user_version").fetchone()[0]
+        if version < SCHEMA_VERSION:
+            self._create_schema()
+
+        # Refresh the planner statistics where they are missing or stale, so
+        # the report queries pick the covering indexes. This only runs
+        # ANALYZE on tables that need it and is cheap otherwise.
+        with self._write_conn() as con:
+            con.execute("PRAGMA optimize")
+
+    def _create_schema(self) -> None:
+        """Create or upgrade the schema and stamp it with `SCHEMA_VERSION`."""
+        # WAL lets readers proceed while a writer commits and, together with
+        # synchronous=NORMAL, avoids an fsync per transaction. journal_mode
+        # cannot be changed inside a transaction, so it is set first.
+        with self._write_conn() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+
+        with self._transaction() as con:
+            # 1. users: Stores user information and their credit balance, in
+            #    whole cents so that sums of prices stay exact.
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    email TEXT UNIQUE NOT NULL,
+                    balance_cents INTEGER NOT NULL DEFAULT 0
+                );
+            """)
+            # Databases created with the old floating point balance column are
+            # converted once. The settle trigger refers to that column, so it
+            # is dropped here and recreated below.
+            columns = {row[1] for row in con.execute("PRAGMA table_info(users)")}
+            if "balance_cents" not in columns:
+                con.execute("DROP TRIGGER IF EXISTS trg_purchase_settle")
+                con.execute(
+                    "ALTER TABLE users "
+                    "ADD COLUMN balance_cents INTEGER NOT NULL DEFAULT 0"
+                )
+                con.execute(
+                    "UPDATE users SET balance_cents = CAST(ROUND(balance * 100) AS INTEGER)"
+                )
+                con.execute("ALTER TABLE users DROP COLUMN balance")
+            # 2. drink_types: A catalog of all available drink types.
+            #    current_stock is the sum of remaining_qty over the type's
+            #    batches, kept up to date by the trg_stock_* triggers.
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS drink_types (
+                    drink_type_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    brand TEXT,
+                    current_stock INTEGER NOT NULL DEFAULT 0
+                );
+            """)
+            # 3. orders: A log of bulk drink orders placed by users.
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS orders (
+                    order_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    orderer_id INTEGER NOT NULL,
+                    order_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    total_cost REAL NOT NULL,
+                    -- Links this order to the user who placed it
+                    FOREIGN KEY (orderer_id) REFERENCES users(user_id)
+                );
+            """)
+            # 4. stock_batches: The main inventory table, tracking each batch.
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS stock_batches (
+                    batch_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    drink_type_id INTEGER NOT NULL,
+                    order_id INTEGER NOT NULL,
+                    orderer_id INTEGER NOT NULL,
+                    cost_per_item REAL NOT NULL,
+                    initial_qty INTEGER NOT NULL,
+                    remaining_qty INTEGER NOT NULL,
+                    date_added TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    -- Links to the specific drink type
+                    FOREIGN KEY (drink_type_id) REFERENCES drink_types(drink_type_id),
+                    -- Links to the bulk order this batch came from
+                    FOREIGN KEY (order_id) REFERENCES orders(order_id),
+                    -- Links to the user who ordered this batch
+                    FOREIGN KEY (orderer_id) REFERENCES users(user_id)
+                );
+            """)
+            # 5. drink_purchases: A log of every single drink taken by a user.
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS drink_purchases (
+                    purchase_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    batch_id INTEGER NOT NULL,
+                    -- 'cost' is copied from the batch for historical accuracy
+                    cost REAL NOT NULL,
+                    charged_to_orderer_id INTEGER NOT NULL,
+                    purchase_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    -- Links to the user who took the drink
+                    FOREIGN KEY (user_id) REFERENCES users(user_id),
+                    -- Links to the specific batch the drink came from
+                    FOREIGN KEY (batch_id) REFERENCES stock_batches(batch_id),
+                    -- Links to the user who is owed money for this drink
+                    FOREIGN KEY (charged_to_orderer_id) REFERENCES users(user_id)
+                );
+            """)
+            # 6. repayments: A log of users paying back other users directly.
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS repayments (
+                    repayment_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    payer_id INTEGER NOT NULL,
+                    receiver_id INTEGER NOT NULL,
+                    amount REAL NOT NULL,
+                    payment_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    -- Links to the user who is paying
+                    FOREIGN KEY (payer_id) REFERENCES users(user_id),
+                    -- Links to the user who is receiving money
+                    FOREIGN KEY (receiver_id) REFERENCES users(user_id)
+                );
+            """)
+            # 7. purchase_log: drink_purchases joined with the user, drink and
+            #    orderer names, kept up to date by the trg_purchase_log* triggers
+            #    so the recent purchases report needs no joins.
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS purchase_log (
+                    purchase_id INTEGER PRIMARY KEY,
+                    user_id INTEGER NOT NULL,
+                    user_name TEXT NOT NULL,
+                    drink_type_id INTEGER NOT NULL,
+                    drink_name TEXT NOT NULL,
+                    cost REAL NOT NULL,
+                    purchase_date TIMESTAMP NOT NULL,
+                    orderer_id INTEGER NOT NULL,
+                    orderer_name TEXT NOT NULL,
+                    FOREIGN KEY (purchase_id) REFERENCES drink_purchases(purchase_id)
+                );
+            """)
+            # 8. user_balances: what each debtor owes each creditor, net of
+            #    repayments, kept up to date by the trg_user_balances_*
+            #    triggers so get_user_debts needs no aggregation.
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS user_balances (
+                    debtor_id INTEGER NOT NULL,
+                    creditor_id INTEGER NOT NULL,
+                    amount REAL NOT NULL DEFAULT 0.00,
+                    PRIMARY KEY (debtor_id, creditor_id),
+                    FOREIGN KEY (debtor_id) REFERENCES users(user_id),
+                    FOREIGN KEY (creditor_id) REFERENCES users(user_id)
+                ) WITHOUT ROWID;
+            """)
+            # Databases created before current_stock existed get the column
+            # and a one-off seed from their batches.
+            columns = {row[1] for row in con.execute("PRAGMA table_info(drink_types)")}
+            if "current_stock" not in columns:
+                con.execute(
+                    "ALTER TABLE drink_types "
+                    "ADD COLUMN current_stock INTEGER NOT NULL DEFAULT 0"
+                )
+                con.execute(_SQL_SEED_CURRENT_STOCK)
+            # Indexes backing the hot lookups. The partial index on stock_batches
+            # only holds batches with stock left and matches the batch pick in
+            # add_purchase, so the oldest batch is the first entry, without a sort.
+            con.execute("""
+                CREATE INDEX IF NOT EXISTS idx_batches_hot
+                ON stock_batches(drink_type_id, date_added)
+                WHERE remaining_qty > 0;
+            """)
+            con.execute("CREATE INDEX IF NOT EXISTS idx_users_name ON users(name);")
+            # Every purchase takes one item from its batch, debits the purchaser
+            # and credits the orderer. Both comparisons are applied to every
+            # matched row, so a user buying from their own batch nets out to
+            # zero. The cost is rounded to whole cents before it is applied.
+            con.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_purchase_settle
+                AFTER INSERT ON drink_purchases
+                BEGIN
+                    UPDATE stock_batches
+                    SET remaining_qty = remaining_qty - 1
+                    WHERE batch_id = NEW.batch_id;
+
+                    UPDATE users
+                    SET balance_cents = balance_cents
+                        + CAST(ROUND(NEW.cost * 100) AS INTEGER) * (
+                            (user_id = NEW.charged_to_orderer_id)
+                            - (user_id = NEW.user_id)
+                        )
+                    WHERE user_id IN (NEW.user_id, NEW.charged_to_orderer_id);
+                END;
+            """)
+            # current_stock maintenance: every change to a batch's remaining
+            # quantity, including the decrement in trg_purchase_settle, is
+            # mirrored onto its drink type.
+            con.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_stock_insert
+                AFTER INSERT ON stock_batches
+                BEGIN
+                    UPDATE drink_types
+                    SET current_stock = current_stock + NEW.remaining_qty
+                    WHERE drink_type_id = NEW.drink_type_id;
+                END;
+            """)
+            con.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_stock_update
+                AFTER UPDATE OF remaining_qty, drink_type_id ON stock_batches
+                BEGIN
+                    UPDATE drink_types
+                    SET current_stock = current_stock - OLD.remaining_qty
+                    WHERE drink_type_id = OLD.drink_type_id;
+                    UPDATE drink_types
+                    SET current_stock = current_stock + NEW.remaining_qty
+                    WHERE drink_type_id = NEW.drink_type_id;
+                END;
+            """)
+            con.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_stock_delete
+                AFTER DELETE ON stock_batches
+                BEGIN
+                    UPDATE drink_types
+                    SET current_stock = current_stock - OLD.remaining_qty
+                    WHERE drink_type_id = OLD.drink_type_id;
+                END;
+            """)
+            # user_balances maintenance: purchases that create a debt add to
+            # the (buyer, orderer) pair, repayments subtract from the (payer,
+            # receiver) pair. Deleting history reverses its effect.
+            con.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_user_balances_purchase
+                AFTER INSERT ON drink_purchases
+                WHEN NEW.user_id <> NEW.charged_to_orderer_id AND NEW.cost > 0
+                BEGIN
+                    INSERT INTO user_balances (debtor_id, creditor_id, amount)
+                    VALUES (NEW.user_id, NEW.charged_to_orderer_id, NEW.cost)
+                    ON CONFLICT (debtor_id, creditor_id)
+                    DO UPDATE SET amount = amount + excluded.amount;
+                END;
+            """)
+            con.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_user_balances_purchase_delete
+                AFTER DELETE ON drink_purchases
+                WHEN OLD.user_id <> OLD.charged_to_orderer_id AND OLD.cost > 0
+                BEGIN
+                    UPDATE user_balances SET amount = amount - OLD.cost
+                    WHERE debtor_id = OLD.user_id
+                        AND creditor_id = OLD.charged_to_orderer_id;
+                END;
+            """)
+            con.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_user_balances_repayment
+                AFTER INSERT ON repayments
+                BEGIN
+                    INSERT INTO user_balances (debtor_id, creditor_id, amount)
+                    VALUES (NEW.payer_id, NEW.receiver_id, -NEW.amount)
+                    ON CONFLICT (debtor_id, creditor_id)
+                    DO UPDATE SET amount = amount + excluded.amount;
+                END;
+            """)
+            con.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_user_balances_repayment_delete
+                AFTER DELETE ON repayments
+                BEGIN
+                    UPDATE user_balances SET amount = amount + OLD.amount
+                    WHERE debtor_id = OLD.payer_id AND creditor_id = OLD.receiver_id;
+                END;
+            """)
+            # Unique, so add_drink_type can use it as its ON CONFLICT target.
+            con.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_drink_types_name_unique "
+                "ON drink_types(name);"
+            )
+            # purchase_log maintenance: one row per purchase, renamed along
+            # with its users and drink type.
+            con.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_purchase_log_insert
+                AFTER INSERT ON drink_purchases
+                BEGIN
+                    {_SQL_FILL_PURCHASE_LOG} WHERE dp.purchase_id = NEW.purchase_id;
+                END;
+            """)
+            con.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_purchase_log_delete
+                AFTER DELETE ON drink_purchases
+                BEGIN
+                    DELETE FROM purchase_log WHERE purchase_id = OLD.purchase_id;
+                END;
+            """)
+            con.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_purchase_log_user_name
+                AFTER UPDATE OF name ON users
+                BEGIN
+                    UPDATE purchase_log SET user_name = NEW.name
+                    WHERE user_id = NEW.user_id;
+                    UPDATE purchase_log SET orderer_name = NEW.name
+                    WHERE orderer_id = NEW.user_id;
+                END;
+            """)
+            con.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_purchase_log_drink_name
+                AFTER UPDATE OF name ON drink_types
+                BEGIN
+                    UPDATE purchase_log SET drink_name = NEW.name
+                    WHERE drink_type_id = NEW.drink_type_id;
+                END;
+            """)
+            con.execute(
+                "CREATE INDEX IF NOT EXISTS idx_purchase_log_date "
+                "ON purchase_log(purchase_date DESC);"
+            )
+            # Backfill databases created before purchase_log existed.
+            con.execute(
+                f"{_SQL_FILL_PURCHASE_LOG} "
+                "WHERE NOT EXISTS (SELECT 1 FROM purchase_log) "
+                "ORDER BY dp.purchase_id"
+            )
+            # Backfill databases created before user_balances existed.
+            if not con.execute("SELECT 1 FROM user_balances LIMIT 1").fetchone():
+                con.execute(_SQL_FILL_USER_BALANCES)
 
-        con = self._get_connection()
-        cur = con.cursor()
-        # 1. users: Stores user information and their credit balance.
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                email TEXT UNIQUE NOT NULL,
-                balance REAL NOT NULL DEFAULT 0.00
-            );
-        """)
-        # 2. drink_types: A catalog of all available drink types.
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS drink_types (
-                drink_type_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                brand TEXT
-            );
-        """)
-        # 3. orders: A log of bulk drink orders placed by users.
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS orders (
-                order_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                orderer_id INTEGER NOT NULL,
-                order_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                total_cost REAL NOT NULL,
-                -- Links this order to the user who placed it
-                FOREIGN KEY (orderer_id) REFERENCES users(user_id)
-            );
-        """)
-        # 4. stock_batches: The main inventory table, tracking each batch.
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS stock_batches (
-                batch_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                drink_type_id INTEGER NOT NULL,
-                order_id INTEGER NOT NULL,
-                orderer_id INTEGER NOT NULL,
-                cost_per_item REAL NOT NULL,
-                initial_qty INTEGER NOT NULL,
-                remaining_qty INTEGER NOT NULL,
-                date_added TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                -- Links to the specific drink type
-                FOREIGN KEY (drink_type_id) REFERENCES drink_types(drink_type_id),
-                -- Links to the bulk order this batch came from
-                FOREIGN KEY (order_id) REFERENCES orders(order_id),
-                -- Links to the user who ordered this batch
-                FOREIGN KEY (orderer_id) REFERENCES users(user_id)
-            );
-        """)
-        # 5. drink_purchases: A log of every single drink taken by a user.
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS drink_purchases (
-                purchase_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                batch_id INTEGER NOT NULL,
-                -- 'cost' is copied from the batch for historical accuracy
-                cost REAL NOT NULL,
-                charged_to_orderer_id INTEGER NOT NULL,
-                purchase_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                -- Links to the user who took the drink
-                FOREIGN KEY (user_id) REFERENCES users(user_id),
-                -- Links to the specific batch the drink came from
-                FOREIGN KEY (batch_id) REFERENCES stock_batches(batch_id),
-                -- Links to the user who is owed money for this drink
-                FOREIGN KEY (charged_to_orderer_id) REFERENCES users(user_id)
-            );
-        """)
-        # 6. repayments: A log of users paying back other users directly.
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS repayments (
-                repayment_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                payer_id INTEGER NOT NULL,
-                receiver_id INTEGER NOT NULL,
-                amount REAL NOT NULL,
-                payment_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                -- Links to the user who is paying
-                FOREIGN KEY (payer_id) REFERENCES users(user_id),
-                -- Links to the user who is receiving money
-                FOREIGN KEY (receiver_id) REFERENCES users(user_id)
-            );
-        """)
-        con.commit()
-        con.close()
+            con.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _fetch_one(
+        self, sql: str, params: tuple, factory: Callable[[tuple], _T]
+    ) -> _T | None:
+        """Run a single-row query on a reader and build the result with ``factory``.
+
+        Returns None when the query matches no row.
+        """
+        with self._read_conn() as con:
+            row = con.execute(sql, params).fetchone()
+        return factory(row) if row else None
 
     ##########################################
     #          User Operations               #
@@ -281,17 +1051,7 @@ class DurstDB(BaseModel):
         Raises:
             sqlite3.Error: If an error occurs while querying the database.
         """
-        con = self._get_connection()
-        cur = con.cursor()
-        cur.execute(
-            "SELECT user_id, name, email, balance FROM users WHERE user_id = ?",
-            (user_id,),
-        )
-        res = cur.fetchone()
-        con.close()
-        if res:
-            return User.from_db_row(res)
-        return None
+        return self._fetch_one(_SQL_USER_BY_ID, (user_id,), User.from_db_row)
 
     def get_user_by_name(self, name: str) -> User | None:
         """Retrieve a User object by name.
@@ -309,16 +1069,7 @@ class DurstDB(BaseModel):
             >>> db = DurstDB()
             >>> user = db.get_user_by_name("alice")
         """
-        con = self._get_connection()
-        cur = con.cursor()
-        cur.execute(
-            "SELECT user_id, name, email, balance FROM users WHERE name = ?", (name,)
-        )
-        res = cur.fetchone()
-        con.close()
-        if res:
-            return User.from_db_row(res)
-        return None
+        return self._fetch_one(_SQL_USER_BY_NAME, (name,), User.from_db_row)
 
     def get_user_by_email(self, email: str) -> User | None:
         """Retrieve a User object by email address.
@@ -332,16 +1083,7 @@ class DurstDB(BaseModel):
         Raises:
             sqlite3.Error: If an error occurs while querying the database.
         """
-        con = self._get_connection()
-        cur = con.cursor()
-        cur.execute(
-            "SELECT user_id, name, email, balance FROM users WHERE email = ?", (email,)
-        )
-        res = cur.fetchone()
-        con.close()
-        if res:
-            return User.from_db_row(res)
-        return None
+        return self._fetch_one(_SQL_USER_BY_EMAIL, (email,), User.from_db_row)
 
     def get_user_id_by_name(self, name: str) -> int | None:
         """Retrieve the user_id for a user with the given name.
@@ -356,11 +1098,8 @@ class DurstDB(BaseModel):
             >>> db = DurstDB()
             >>> user_id = db.get_user_id_by_name("alice")
         """
-        con = self._get_connection()
-        cur = con.cursor()
-        cur.execute("SELECT user_id FROM users WHERE name = ?", (name,))
-        res = cur.fetchone()
-        con.close()
+        with self._read_conn() as con:
+            res = con.execute(_SQL_USER_ID_BY_NAME, (name,)).fetchone()
         return res[0] if res else None
 
     def get_all_users(self) -> list[User]:
@@ -369,12 +1108,21 @@ class DurstDB(BaseModel):
         Returns:
             list[User]: A list of all User objects.
         """
-        con = self._get_connection()
-        cur = con.cursor()
-        cur.execute("SELECT user_id, name, email, balance FROM users ORDER BY name")
-        rows = cur.fetchall()
-        con.close()
-        return [User.from_db_row(row) for row in rows]
+        with self._read_conn() as con:
+            return [User.from_db_row(row) for row in con.execute(_SQL_ALL_USERS)]
+
+    def iter_all_users(self) -> Iterator[User]:
+        """Yield all users ordered by name, one row at a time.
+
+        Unlike `get_all_users`, the result is never materialized as a list. A
+        pooled reader stays checked out until the iterator is exhausted or
+        closed.
+
+        Yields:
+            User: The next user.
+        """
+        for row in self._iter_rows(_SQL_ALL_USERS):
+            yield User.from_db_row(row)
 
     def add_user(self, name: str, email: str, verbose: bool = True) -> int | None:
         """Add a new user to the database.
@@ -382,7 +1130,8 @@ class DurstDB(BaseModel):
         Args:
             name (str): The user's name.
             email (str): The user's email address (must be unique).
-            verbose (bool): If True, prints a confirmation message. Defaults to True.
+            verbose (bool): If True, logs a confirmation message at DEBUG level.
+                Defaults to True.
 
         Returns:
             int|None: The new user_id if created, or existing user_id if email already exists.
@@ -390,27 +1139,19 @@ class DurstDB(BaseModel):
         Raises:
             sqlite3.Error: If a database error occurs.
         """
-        con = self._get_connection()
-        cur = con.cursor()
-        cur.execute("SELECT user_id FROM users WHERE email = ?", (email,))
-        existing = cur.fetchone()
-        if existing:
-            if verbose:
-                print(
-                    f"Database: User with email {email} already exists (id={existing[0]})"
-                )
-            con.close()
-            return existing[0]
-
-        cur.execute(
-            "INSERT INTO users (name, email) VALUES (?, ?)",
-            (name, email),
-        )
-        user_id = cur.lastrowid
-        con.commit()
-        con.close()
+        with self._transaction() as con:
+            inserted = con.execute(_SQL_INSERT_USER, (name, email)).fetchone()
+            if inserted is None:
+                # The email is taken, so nothing was written
+                existing = con.execute(_SQL_USER_ID_BY_EMAIL, (email,)).fetchone()
+                if verbose:
+                    logger.debug(
+                        "User with email %s already exists (id=%s)", email, existing[0]
+                    )
+                return existing[0]
+        user_id = inserted[0]
         if verbose:
-            print(f"Database: Added user {name} with email {email}")
+            logger.debug("Added user %s with email %s", name, email)
         return user_id
 
     def get_user_balance(self, user_id: int) -> float:
@@ -426,14 +1167,38 @@ class DurstDB(BaseModel):
             ValueError: If the user_id does not exist in the database.
             sqlite3.Error: If a database error occurs.
         """
-        con = self._get_connection()
-        cur = con.cursor()
-        cur.execute("SELECT balance FROM users WHERE user_id = ?", (user_id,))
-        res = cur.fetchone()
-        con.close()
-        if res is None:
-            raise ValueError(f"User ID {user_id} not found.")
-        return res[0]
+        with self._read_conn() as con:
+            res = con.execute(_SQL_USER_BALANCE, (user_id,)).fetchone()
+            if res is None:
+                raise ValueError(f"User ID {user_id} not found.")
+            return res[0] / 100
+
+    def get_users_by_names(self, names: list[str]) -> dict[str, User]:
+        """Retrieve several users by name with a single query.
+
+        Args:
+            names (list[str]): The exact names of the users to look up.
+
+        Returns:
+            dict[str, User]: The User object per name. Unknown names are left
+                out; when several users share a name, the oldest one is used,
+                as in `get_user_id_by_name`.
+
+        Raises:
+            sqlite3.Error: If a database error occurs.
+
+        Example:
+            >>> users = db.get_users_by_names(["Alice", "Bob"])
+            >>> users["Bob"].balance
+        """
+        names = list(dict.fromkeys(names))
+        if not names:
+            return {}
+        with self._read_conn() as con:
+            cur = con.execute(
+                _SQL_USERS_BY_NAMES.format(", ".join("?" * len(names))), names
+            )
+            return {row[1]: User.from_db_row(row) for row in cur}
 
     ##########################################
     #        Drink Type Operations           #
@@ -447,17 +1212,9 @@ class DurstDB(BaseModel):
         Returns:
             DrinkType|None: The DrinkType object if found, otherwise None.
         """
-        con = self._get_connection()
-        cur = con.cursor()
-        cur.execute(
-            "SELECT drink_type_id, name, brand FROM drink_types WHERE drink_type_id = ?",
-            (drink_type_id,),
+        return self._fetch_one(
+            _SQL_DRINK_TYPE_BY_ID, (drink_type_id,), DrinkType.from_db_row
         )
-        res = cur.fetchone()
-        con.close()
-        if res:
-            return DrinkType.from_db_row(res)
-        return None
 
     def get_drink_type_by_name(self, name: str) -> DrinkType | None:
         """Retrieve a DrinkType object by name.
@@ -472,16 +1229,7 @@ class DurstDB(BaseModel):
             >>> db = DurstDB()
             >>> drink = db.get_drink_type_by_name("Cola")
         """
-        con = self._get_connection()
-        cur = con.cursor()
-        cur.execute(
-            "SELECT drink_type_id, name, brand FROM drink_types WHERE name = ?", (name,)
-        )
-        res = cur.fetchone()
-        con.close()
-        if res:
-            return DrinkType.from_db_row(res)
-        return None
+        return self._fetch_one(_SQL_DRINK_TYPE_BY_NAME, (name,), DrinkType.from_db_row)
 
     def get_drink_type_id_by_name(self, name: str) -> int | None:
         """Retrieve the drink_type_id for a drink type with the given name.
@@ -496,11 +1244,8 @@ class DurstDB(BaseModel):
             >>> db = DurstDB()
             >>> drink_id = db.get_drink_type_id_by_name("Cola")
         """
-        con = self._get_connection()
-        cur = con.cursor()
-        cur.execute("SELECT drink_type_id FROM drink_types WHERE name = ?", (name,))
-        res = cur.fetchone()
-        con.close()
+        with self._read_conn() as con:
+            res = con.execute(_SQL_DRINK_TYPE_ID_BY_NAME, (name,)).fetchone()
         return res[0] if res else None
 
     def get_all_drink_types(self) -> list[DrinkType]:
@@ -509,12 +1254,22 @@ class DurstDB(BaseModel):
         Returns:
             list[DrinkType]: A list of all DrinkType objects.
         """
-        con = self._get_connection()
-        cur = con.cursor()
-        cur.execute("SELECT drink_type_id, name, brand FROM drink_types ORDER BY name")
-        rows = cur.fetchall()
-        con.close()
-        return [DrinkType.from_db_row(row) for row in rows]
+        with self._read_conn() as con:
+            return [
+                DrinkType.from_db_row(row) for row in con.execute(_SQL_ALL_DRINK_TYPES)
+            ]
+
+    def iter_all_drink_types(self) -> Iterator[DrinkType]:
+        """Yield all drink types ordered by name, one row at a time.
+
+        A pooled reader stays checked out until the iterator is exhausted or
+        closed.
+
+        Yields:
+            DrinkType: The next drink type.
+        """
+        for row in self._iter_rows(_SQL_ALL_DRINK_TYPES):
+            yield DrinkType.from_db_row(row)
 
     def add_drink_type(
         self, name: str, brand: str = "", verbose: bool = True
@@ -524,7 +1279,8 @@ class DurstDB(BaseModel):
         Args:
             name (str): The name of the drink type.
             brand (str): The brand of the drink. Defaults to an empty string.
-            verbose (bool): If True, prints a confirmation message. Defaults to True.
+            verbose (bool): If True, logs a confirmation message at DEBUG level.
+                Defaults to True.
 
         Returns:
             int|None: The new drink_type_id if created, or existing id if drink already exists.
@@ -532,35 +1288,31 @@ class DurstDB(BaseModel):
         Raises:
             sqlite3.Error: If a database error occurs.
         """
-        con = self._get_connection()
-        cur = con.cursor()
-        cur.execute("SELECT drink_type_id FROM drink_types WHERE name = ?", (name,))
-        existing = cur.fetchone()
-        if existing:
-            if verbose:
-                print(
-                    f"Database: Drink type '{name}' already exists (id={existing[0]})"
-                )
-            con.close()
-            return existing[0]
-
-        cur.execute(
-            "INSERT INTO drink_types (name, brand) VALUES (?, ?)",
-            (name, brand),
-        )
-        drink_type_id = cur.lastrowid
-        con.commit()
-        con.close()
+        with self._transaction() as con:
+            inserted = con.execute(_SQL_INSERT_DRINK_TYPE, (name, brand)).fetchone()
+            if inserted is None:
+                # The name is taken, so nothing was written
+                existing = con.execute(_SQL_DRINK_TYPE_ID_BY_NAME, (name,)).fetchone()
+                if verbose:
+                    logger.debug(
+                        "Drink type '%s' already exists (id=%s)", name, existing[0]
+                    )
+                return existing[0]
+        drink_type_id = inserted[0]
         if verbose:
-            print(f"Database: Added drink type '{name}' with brand '{brand}'")
+            logger.debug("Added drink type '%s' with brand '%s'", name, brand)
         return drink_type_id
 
     ##########################################
     #        Stock & Order Operations        #
     ##########################################
     def stock_new_drinks(
-        self, orderer_id: int, total_cost: float, items_list: list, verbose: bool = True
-    ) -> int | None:
+        self,
+        orderer_id: int,
+        total_cost: float,
+        items_list: list[tuple[int, float, int]],
+        verbose: bool = True,
+    ) -> int:
         """
         Add a new stock order to the database.
 
@@ -569,6 +1321,62 @@ class DurstDB(BaseModel):
         2. Create one or more records in the 'stock_batches' table, one for
            each type of drink included in the order, linking them to the new order.
 
+        Args:
+            orderer_id (int): The user_id of the person who placed the order.
+            total_cost (float): The total cost of the entire order.
+            items_list (list): A list of ``(drink_type_id, cost_per_item, quantity)``
+                tuples, one per drink type in the order.
+            verbose (bool): If True, logs a confirmation message at DEBUG level.
+                Defaults to True.
+
+        Returns:
+            int: The new order_id.
+
+        Raises:
+            sqlite3.Error: If the order cannot be recorded, e.g. because the
+                orderer does not exist or the database is locked. Nothing is
+                written in that case.
+        """
+
+        # '_transaction' begins a transaction and commits it.
+        # If an exception occurs, it rolls back.
+        with self._transaction() as conn:
+            # Step 1: Create the new record in the 'orders' table and
+            # get the 'order_id' of the order we just created
+            new_order_id = conn.execute(
+                _SQL_INSERT_ORDER, (orderer_id, total_cost)
+            ).lastrowid
+
+            if not new_order_id:
+                raise Error("Failed to create order, lastrowid not found.")
+
+            # Step 2: Prepare the data for the 'stock_batches' table
+            batches_to_insert = self._batch_rows(new_order_id, orderer_id, items_list)
+
+            # Step 3: Insert all batches with multi-row INSERTs
+            self._insert_batches(conn, batches_to_insert)
+
+        if verbose:
+            logger.debug(
+                "Stocked order ID %s with %d new batch(es)",
+                new_order_id,
+                len(batches_to_insert),
+            )
+        return new_order_id
+
+    def stock_new_drinks_from_dicts(
+        self,
+        orderer_id: int,
+        total_cost: float,
+        items_list: list[dict],
+        verbose: bool = True,
+    ) -> int:
+        """
+        Add a new stock order given its items as dictionaries.
+
+        Thin wrapper around `stock_new_drinks` for callers that still build
+        their items as dicts.
+
         Args:
             orderer_id (int): The user_id of the person who placed the order.
             total_cost (float): The total cost of the entire order.
@@ -578,59 +1386,102 @@ class DurstDB(BaseModel):
                     "cost_per_item": float,
                     "quantity": int
                 }
-            verbose (bool): If True, prints a confirmation message. Defaults to True.
+            verbose (bool): If True, logs a confirmation message at DEBUG level.
+                Defaults to True.
 
         Returns:
-            int|None: The new order_id if successful, None if an error occurred.
+            int: The new order_id.
+
+        Raises:
+            sqlite3.Error: If the order cannot be recorded.
         """
+        return self.stock_new_drinks(
+            orderer_id,
+            total_cost,
+            [
+                (i["drink_type_id"], i["cost_per_item"], i["quantity"])
+                for i in items_list
+            ],
+            verbose=verbose,
+        )
 
-        # Use 'with conn:' which automatically begins a transaction
-        # and commits it. If an exception occurs, it rolls back.
-        try:
-            with self._get_connection() as conn:
-                cursor = conn.cursor()
+    def stock_many_orders(
+        self,
+        orders: list[tuple[int, float, list[tuple[int, float, int]]]],
+        verbose: bool = False,
+    ) -> list[int]:
+        """
+        Add several stock orders to the database in a single transaction.
 
-                # Step 1: Create the new record in the 'orders' table
-                sql_order = "INSERT INTO orders (orderer_id, total_cost) VALUES (?, ?)"
-                cursor.execute(sql_order, (orderer_id, total_cost))
+        Intended for bulk loads: the orders are inserted one by one to obtain
+        their IDs, then the batches of all orders are written with multi-row
+        INSERTs, and everything is committed once.
 
-                # Get the 'order_id' of the order we just created
-                new_order_id = cursor.lastrowid
+        Args:
+            orders (list): A list of ``(orderer_id, total_cost, items_list)``
+                tuples, with ``items_list`` in the format accepted by
+                `stock_new_drinks`.
+            verbose (bool): If True, logs a confirmation message at DEBUG level.
+                Defaults to False, as bulk loads are not reported.
 
+        Returns:
+            list[int]: The new order_ids in input order.
+
+        Raises:
+            sqlite3.Error: If any order cannot be recorded. None of the orders
+                are written in that case.
+        """
+        with self._transaction() as conn:
+            order_ids = []
+            batches_to_insert = []
+            for orderer_id, total_cost, items_list in orders:
+                new_order_id = conn.execute(
+                    _SQL_INSERT_ORDER, (orderer_id, total_cost)
+                ).lastrowid
                 if not new_order_id:
                     raise Error("Failed to create order, lastrowid not found.")
-
-                # Step 2: Prepare the data for the 'stock_batches' table
-                batches_to_insert = []
-                for item in items_list:
-                    batch_data = (
-                        item["drink_type_id"],
-                        new_order_id,
-                        orderer_id,
-                        item["cost_per_item"],
-                        item["quantity"],
-                        item["quantity"],  # remaining_qty starts equal to initial_qty
-                    )
-                    batches_to_insert.append(batch_data)
-
-                # Step 3: Insert all batches using executemany for efficiency
-                sql_batch = """
-                    INSERT INTO stock_batches
-                        (drink_type_id, order_id, orderer_id, cost_per_item, initial_qty, remaining_qty)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """
-                cursor.executemany(sql_batch, batches_to_insert)
-
-            if verbose:
-                print(
-                    f"Successfully stocked order ID: {new_order_id} with {len(batches_to_insert)} new batch(es)."
+                order_ids.append(new_order_id)
+                batches_to_insert += self._batch_rows(
+                    new_order_id, orderer_id, items_list
                 )
-            return new_order_id
 
-        except Error as e:
-            print(f"Error during stocking operation: {e}")
-            # The 'with conn:' block handles the rollback automatically
-            return None
+            self._insert_batches(conn, batches_to_insert)
+
+        if verbose:
+            logger.debug(
+                "Stocked %d order(s) with %d new batch(es)",
+                len(order_ids),
+                len(batches_to_insert),
+            )
+        return order_ids
+
+    @staticmethod
+    def _batch_rows(
+        order_id: int, orderer_id: int, items_list: list[tuple[int, float, int]]
+    ) -> list[tuple]:
+        """Build the stock_batches rows for the items of one order."""
+        # remaining_qty starts equal to initial_qty
+        return [
+            (drink_type_id, order_id, orderer_id, cost_per_item, qty, qty)
+            for drink_type_id, cost_per_item, qty in items_list
+        ]
+
+    @staticmethod
+    def _insert_batches(con: sqlite3.Connection, rows: list[tuple]) -> None:
+        """Insert stock_batches rows with as few statements as possible.
+
+        Each statement carries up to BATCH_INSERT_CHUNK rows in its VALUES
+        list, so the rows are bound and executed in one call per chunk instead
+        of once per row.
+        """
+        for start in range(0, len(rows), BATCH_INSERT_CHUNK):
+            chunk = rows[start : start + BATCH_INSERT_CHUNK]
+            con.execute(
+                _SQL_INSERT_BATCHES.format(
+                    ", ".join([_BATCH_ROW_PLACEHOLDERS] * len(chunk))
+                ),
+                [value for row in chunk for value in row],
+            )
 
     ##########################################
     #        Purchase Operations             #
@@ -639,12 +1490,9 @@ class DurstDB(BaseModel):
         """Add a purchase record for a user buying a drink from the oldest available stock batch.
 
         This function:
-        - Looks up the purchaser and drink type by name.
-        - Selects the oldest stock batch for the requested drink type that has remaining stock.
-        - Inserts a row into drink_purchases linking the purchaser to the batch and recording the cost.
-        - Decrements the remaining quantity on the selected stock batch.
-        - Updates balances: subtracts the cost from the purchaser and credits the orderer who paid for the batch.
-        - Uses a single SQLite transaction (context manager) so all changes commit together or roll back on error.
+        - Inserts a row into drink_purchases for the oldest stock batch of the requested drink type that has remaining stock, resolving the purchaser and drink names in the same statement.
+        - The trg_purchase_settle trigger then decrements the batch's remaining quantity, subtracts the cost from the purchaser and credits the orderer who paid for the batch.
+        - Uses a single explicit SQLite transaction so all changes commit together or roll back on error.
 
         Args:
             user (str): Purchaser's name.
@@ -659,73 +1507,113 @@ class DurstDB(BaseModel):
 
         Notes:
             - The batch selection uses ORDER BY date_added ASC and LIMIT 1 to pick the oldest available batch with remaining_qty > 0.
+            - Inside `open_bulk` the preloaded ids are used, as long as their rows still carry the given names.
+            - Only when nothing was inserted are the names resolved again, to tell which one is missing.
             - Concurrency: SQLite uses coarse-grained locking; concurrent calls may need retry logic or a different DB for high concurrency scenarios.
         """
-        purchaser_id = self.get_user_id_by_name(user)
-        if purchaser_id is None:
-            raise ValueError(f"User not found: {user}")
+        purchaser_id = self._user_ids.get(user)
+        drink_type_id = self._drink_type_ids.get(drink)
+        with self._transaction() as conn:
+            inserted = None
+            if purchaser_id is not None and drink_type_id is not None:
+                inserted = conn.execute(
+                    _SQL_INSERT_PURCHASE_BY_ID,
+                    (purchaser_id, user, drink_type_id, drink),
+                ).fetchone()
+                if inserted is None:
+                    # One of the rows may have been renamed since the names
+                    # were cached; forget them and resolve the names afresh.
+                    self._user_ids.pop(user, None)
+                    self._drink_type_ids.pop(drink, None)
+            if inserted is None:
+                inserted = conn.execute(
+                    _SQL_INSERT_PURCHASE_BY_NAME, (user, drink)
+                ).fetchone()
+            if inserted is None:
+                purchaser_id, drink_type_id = conn.execute(
+                    _SQL_RESOLVE_PURCHASE, (user, drink)
+                ).fetchone()
+                if purchaser_id is None:
+                    raise ValueError(f"User not found: {user}")
+                if drink_type_id is None:
+                    raise ValueError(f"Drink type not found: {drink}")
+                raise ValueError(f"No stock available for drink: {drink}")
+
+        return inserted[0]
+
+    def add_purchases_many(self, purchases: list[tuple[str, str]]) -> list[int]:
+        """Add several purchases in a single transaction.
+
+        All user and drink type names are resolved up front with one query per
+        table, then each purchase runs the same statements as `add_purchase`.
+        Everything is committed once at the end, so either all purchases are
+        recorded or none are.
 
-        drink_type_id = self.get_drink_type_id_by_name(drink)
-        if drink_type_id is None:
-            raise ValueError(f"Drink type not found: {drink}")
+        Args:
+            purchases (list[tuple[str, str]]): ``(user, drink)`` name pairs, in
+                the order they should be recorded.
 
-        try:
-            with self._get_connection() as conn:
-                cur = conn.cursor()
-
-                # Find oldest batch with remaining stock for this drink
-                cur.execute(
-                    """
-                    SELECT batch_id, cost_per_item, orderer_id, remaining_qty
-                    FROM stock_batches
-                    WHERE drink_type_id = ? AND remaining_qty > 0
-                    ORDER BY date_added ASC
-                    LIMIT 1
-                    """,
-                    (drink_type_id,),
-                )
-                batch = cur.fetchone()
-                if not batch:
-                    raise ValueError(f"No stock available for drink: {drink}")
-
-                batch_id, cost_per_item, charged_to_orderer_id, remaining_qty = batch
-
-                # Insert purchase record (purchase_date defaults in DB)
-                cur.execute(
-                    """
-                    INSERT INTO drink_purchases
-                        (user_id, batch_id, cost, charged_to_orderer_id)
-                    VALUES (?, ?, ?, ?)
-                    """,
-                    (purchaser_id, batch_id, cost_per_item, charged_to_orderer_id),
-                )
-                purchase_id = cur.lastrowid
+        Returns:
+            list[int]: The new purchase_ids, in input order.
 
-                if purchase_id is None:
-                    raise sqlite3.Error("Failed to record purchase.")
+        Raises:
+            ValueError: If a name cannot be resolved or a drink runs out of stock.
+            sqlite3.Error: If inserting the purchases or updating the database fails.
+        """
+        if not purchases:
+            return []
 
-                # Decrement remaining quantity on the batch
-                cur.execute(
-                    "UPDATE stock_batches SET remaining_qty = remaining_qty - 1 WHERE batch_id = ?",
-                    (batch_id,),
-                )
+        user_names = list({user for user, _ in purchases})
+        drink_names = list({drink for _, drink in purchases})
 
-                # Decrease purchaser's balance by the cost
-                cur.execute(
-                    "UPDATE users SET balance = balance - ? WHERE user_id = ?",
-                    (cost_per_item, purchaser_id),
+        with self._transaction() as conn:
+            user_ids = dict(
+                conn.execute(
+                    _SQL_USER_IDS_BY_NAMES.format(", ".join("?" * len(user_names))),
+                    user_names,
+                )
+            )
+            drink_type_ids = dict(
+                conn.execute(
+                    _SQL_DRINK_TYPE_IDS_BY_NAMES.format(
+                        ", ".join("?" * len(drink_names))
+                    ),
+                    drink_names,
                 )
+            )
 
-                # Credit the orderer who paid for the batch (so their balance reflects being owed)
-                cur.execute(
-                    "UPDATE users SET balance = balance + ? WHERE user_id = ?",
-                    (cost_per_item, charged_to_orderer_id),
+            purchase_ids = []
+            for user, drink in purchases:
+                if user not in user_ids:
+                    raise ValueError(f"User not found: {user}")
+                if drink not in drink_type_ids:
+                    raise ValueError(f"Drink type not found: {drink}")
+                purchase_ids.append(
+                    self._record_purchase(
+                        conn, user_ids[user], user, drink_type_ids[drink], drink
+                    )
                 )
 
-            return purchase_id
+        return purchase_ids
 
-        except sqlite3.Error as e:
-            raise e
+    @staticmethod
+    def _record_purchase(
+        con: sqlite3.Connection,
+        purchaser_id: int,
+        user: str,
+        drink_type_id: int,
+        drink: str,
+    ) -> int:
+        """Record a purchase from the oldest batch with remaining stock.
+
+        Must be called inside an open transaction.
+        """
+        inserted = con.execute(
+            _SQL_INSERT_PURCHASE_BY_ID, (purchaser_id, user, drink_type_id, drink)
+        ).fetchone()
+        if inserted is None:
+            raise ValueError(f"No stock available for drink: {drink}")
+        return inserted[0]
 
     ##########################################
     #        Repayment Operations            #
@@ -733,7 +1621,7 @@ class DurstDB(BaseModel):
     def add_repayment(self, payer_id: int, receiver_id: int, amount: float) -> int:
         """Record a repayment and update user balances.
 
-        Inserts a row into repayments and adjusts the payer's and receiver's balances within a single transaction. Returns the new repayment_id.
+        Inserts a row into repayments, whose foreign keys verify that both users exist, and adjusts the payer's and receiver's balances with a single UPDATE, all within a single transaction. Returns the new repayment_id.
 
         The payer hands cash to the receiver, settling debt: the payer's balance
         increases (toward zero) and the receiver's balance decreases, since they
@@ -757,43 +1645,118 @@ class DurstDB(BaseModel):
         if payer_id == receiver_id:
             raise ValueError("Payer and receiver must be different users")
 
-        with self._get_connection() as conn:
-            cur = conn.cursor()
-
-            # Verify payer exists
-            cur.execute("SELECT 1 FROM users WHERE user_id = ?", (payer_id,))
-            if not cur.fetchone():
-                raise ValueError(f"Payer not found: {payer_id}")
-
-            # Verify receiver exists
-            cur.execute("SELECT 1 FROM users WHERE user_id = ?", (receiver_id,))
-            if not cur.fetchone():
-                raise ValueError(f"Receiver not found: {receiver_id}")
-
-            # Insert repayment record
-            cur.execute(
-                "INSERT INTO repayments (payer_id, receiver_id, amount) VALUES (?, ?, ?)",
-                (payer_id, receiver_id, amount),
-            )
-            repayment_id = cur.lastrowid
+        with self._transaction() as conn:
+            # Insert repayment record; the foreign keys reject unknown users
+            try:
+                repayment_id = conn.execute(
+                    _SQL_INSERT_REPAYMENT, (payer_id, receiver_id, amount)
+                ).lastrowid
+            except sqlite3.IntegrityError:
+                if not conn.execute(_SQL_USER_EXISTS, (payer_id,)).fetchone():
+                    raise ValueError(f"Payer not found: {payer_id}") from None
+                raise ValueError(f"Receiver not found: {receiver_id}") from None
             if repayment_id is None:
                 raise sqlite3.Error("Failed to record repayment")
 
             # Update balances: the payer settled debt, the receiver is owed less
-            cur.execute(
-                "UPDATE users SET balance = balance + ? WHERE user_id = ?",
-                (amount, payer_id),
-            )
-            cur.execute(
-                "UPDATE users SET balance = balance - ? WHERE user_id = ?",
-                (amount, receiver_id),
+            conn.execute(
+                _SQL_SETTLE_REPAYMENT,
+                (amount, payer_id, receiver_id, payer_id, receiver_id),
             )
 
         return repayment_id
 
+    def recompute_balances_from_scratch(self) -> None:
+        """Rebuild every user's balance from the purchase and repayment history.
+
+        The incremental updates done by purchases and repayments should always
+        agree with the history; this repairs balances that drifted, e.g. after
+        rows were edited by hand. All users are reset to zero and then credited
+        with a single aggregate over both logs, and the pairwise debts in
+        ``user_balances`` are rebuilt the same way, inside one transaction.
+        """
+        with self._transaction() as con:
+            con.execute(_SQL_RESET_BALANCES)
+            con.execute(_SQL_RECOMPUTE_BALANCES)
+            con.execute("DELETE FROM user_balances")
+            con.execute(_SQL_FILL_USER_BALANCES)
+
+    def bulk_seed(
+        self,
+        users: list[tuple[str, str]],
+        drink_types: list[tuple[str, str]],
+        orders: list[tuple[str, list[tuple[str, float, int]]]],
+        purchases: list[tuple[str, str]],
+        repayments: list[tuple[str, str, float]],
+    ) -> None:
+        """Load a complete data set, referring to users and drinks by name.
+
+        Meant for fixtures, demos and imports. Users and drink types go in with
+        one ``executemany`` each, then the names are resolved once and the
+        orders, purchases and repayments are recorded through the regular
+        bulk paths. Everything runs in a single transaction, so either the
+        whole data set is stored or none of it.
+
+        Args:
+            users (list[tuple[str, str]]): ``(name, email)`` pairs.
+            drink_types (list[tuple[str, str]]): ``(name, brand)`` pairs.
+            orders (list): ``(orderer_name, items)`` tuples, where ``items``
+                is a list of ``(drink_name, cost_per_item, quantity)``. The
+                order total is the sum of the items.
+            purchases (list[tuple[str, str]]): ``(user_name, drink_name)``
+                pairs, in the format accepted by `add_purchases_many`.
+            repayments (list[tuple[str, str, float]]): ``(payer_name,
+                receiver_name, amount)`` tuples.
+
+        Raises:
+            ValueError: If a name cannot be resolved, a drink runs out of stock
+                or a repayment is invalid.
+            sqlite3.Error: If writing to the database fails.
+        """
+        with self._transaction() as con:
+            con.executemany(_SQL_SEED_USER, users)
+            con.executemany(_SQL_SEED_DRINK_TYPE, drink_types)
+            user_ids = dict(con.execute(_SQL_ALL_USER_IDS))
+            drink_type_ids = dict(con.execute(_SQL_ALL_DRINK_TYPE_IDS))
+
+            try:
+                resolved_orders = [
+                    (
+                        user_ids[orderer],
+                        sum(cost * qty for _, cost, qty in items),
+                        [
+                            (drink_type_ids[drink], cost, qty)
+                            for drink, cost, qty in items
+                        ],
+                    )
+                    for orderer, items in orders
+                ]
+                resolved_repayments = [
+                    (user_ids[payer], user_ids[receiver], amount)
+                    for payer, receiver, amount in repayments
+                ]
+            except KeyError as e:
+                raise ValueError(f"Name not found: {e.args[0]}") from None
+
+            if resolved_orders:
+                self.stock_many_orders(resolved_orders)
+            self.add_purchases_many(purchases)
+            for payer_id, receiver_id, amount in resolved_repayments:
+                self.add_repayment(payer_id, receiver_id, amount)
+
     ##########################################
     #        Query & Reporting Methods       #
     ##########################################
+    @staticmethod
+    def _rows_as_dicts(cur: sqlite3.Cursor) -> list[dict]:
+        """Turn the rows of an executed query into dicts keyed by column name.
+
+        The column names are read once and the cursor is iterated directly, so
+        no intermediate ``fetchall()`` list is built.
+        """
+        columns = [desc[0] for desc in cur.description]
+        return [dict(zip(columns, row)) for row in cur]
+
     def get_recent_purchases(self, limit: int = 50) -> list[dict]:
         """Get recent purchase records with user and drink details.
 
@@ -803,83 +1766,247 @@ class DurstDB(BaseModel):
         Returns:
             list[dict]: A list of dictionaries containing purchase details.
         """
-        con = self._get_connection()
-        cur = con.cursor()
-        cur.execute(
-            """
-            SELECT
-                dp.purchase_id,
-                u.name as user_name,
-                dt.name as drink_name,
-                dp.cost,
-                dp.purchase_date,
-                orderer.name as orderer_name
-            FROM drink_purchases dp
-            JOIN users u ON dp.user_id = u.user_id
-            JOIN stock_batches sb ON dp.batch_id = sb.batch_id
-            JOIN drink_types dt ON sb.drink_type_id = dt.drink_type_id
-            JOIN users orderer ON dp.charged_to_orderer_id = orderer.user_id
-            ORDER BY dp.purchase_date DESC
-            LIMIT ?
-        """,
-            (limit,),
-        )
+        with self._read_conn() as con:
+            cur = con.execute(_SQL_RECENT_PURCHASES, (limit,))
+            return self._rows_as_dicts(cur)
 
-        columns = [desc[0] for desc in cur.description]
-        rows = cur.fetchall()
-        con.close()
+    def iter_recent_purchases(self, limit: int = 50) -> Iterator[tuple]:
+        """Yield recent purchase records as plain row tuples, newest first.
+
+        Same query and column order as `get_recent_purchases_raw`, but rows are
+        streamed off the cursor rather than collected, so large pages are never
+        held in memory twice. A pooled reader stays checked out until the
+        iterator is exhausted or closed.
+
+        Args:
+            limit (int): Maximum number of records to yield. Defaults to 50.
+
+        Yields:
+            tuple: The next purchase.
+        """
+        yield from self._iter_rows(_SQL_RECENT_PURCHASES, (limit,))
+
+    def get_recent_purchases_raw(
+        self, limit: int = 50
+    ) -> tuple[list[str], list[tuple]]:
+        """Get recent purchase records as plain row tuples.
+
+        Same query as `get_recent_purchases`, for callers that consume rows
+        positionally (e.g. to fill a table) and have no use for a dict per row.
+
+        Args:
+            limit (int): Maximum number of records to return. Defaults to 50.
 
-        return [dict(zip(columns, row)) for row in rows]
+        Returns:
+            tuple[list[str], list[tuple]]: The column names, and one tuple per
+                purchase with the values in that order.
+        """
+        with self._read_conn() as con:
+            cur = con.execute(_SQL_RECENT_PURCHASES, (limit,))
+            return [d[0] for d in cur.description], cur.fetchall()
+
+    def get_dashboard_snapshot(self, limit: int = 50) -> DashboardSnapshot:
+        """Get the recent purchases, stock, users and debts in one go.
+
+        All four reports run on the same reader inside one read transaction,
+        so they come from a single consistent snapshot of the database and
+        cost one connection checkout instead of four.
+
+        Args:
+            limit (int): Maximum number of recent purchases. Defaults to 50.
+
+        Returns:
+            DashboardSnapshot: The recent purchases as row tuples (in the
+                column order of `get_recent_purchases_raw`), the stock status,
+                all users and the debts.
+        """
+        with self._read_conn() as con:
+            # Inside a caller's transaction the snapshot is already fixed.
+            own_snapshot = not con.in_transaction
+            if own_snapshot:
+                con.execute("BEGIN")
+            try:
+                return DashboardSnapshot.model_construct(
+                    recent_purchases=self.get_recent_purchases_raw(limit)[1],
+                    stock=self.get_stock_status(),
+                    users=self.get_all_users(),
+                    debts=self.get_user_debts(),
+                )
+            finally:
+                if own_snapshot:
+                    con.execute("COMMIT")
 
     def get_stock_status(self) -> list[dict]:
         """Get current stock status for all drink types.
 
+        The remaining quantities come from the ``current_stock`` counter that
+        triggers keep in sync with ``stock_batches``, so no aggregation runs.
+
         Returns:
             list[dict]: A list of dictionaries with drink name and remaining quantity.
         """
-        con = self._get_connection()
-        cur = con.cursor()
-        cur.execute("""
-            SELECT
-                dt.name as drink_name,
-                dt.brand,
-                COALESCE(SUM(sb.remaining_qty), 0) as total_remaining
-            FROM drink_types dt
-            LEFT JOIN stock_batches sb ON dt.drink_type_id = sb.drink_type_id
-            GROUP BY dt.drink_type_id, dt.name, dt.brand
-            ORDER BY dt.name
-        """)
+        with self._read_conn() as con:
+            cur = con.execute(_SQL_STOCK_STATUS)
+            return self._rows_as_dicts(cur)
 
-        columns = [desc[0] for desc in cur.description]
-        rows = cur.fetchall()
-        con.close()
+    def get_stock_status_by_name(self) -> dict[str, dict]:
+        """Get current stock status keyed by drink name.
+
+        Same rows as `get_stock_status`, for callers that look drinks up by
+        name instead of scanning the list.
 
-        return [dict(zip(columns, row)) for row in rows]
+        Returns:
+            dict[str, dict]: The stock status row of each drink type.
+        """
+        return {row["drink_name"]: row for row in self.get_stock_status()}
 
     def get_user_debts(self) -> list[dict]:
         """Get a summary of who owes money to whom.
 
+        Each pair of users is reported at most once, in the direction of the
+        net debt: purchases both ways and repayments between the two are
+        offset against each other, so an overpayment shows up as a debt of the
+        receiver. The amounts are read from ``user_balances``, which triggers
+        keep up to date, so no aggregation over the purchase history runs.
+
         Returns:
             list[dict]: A list of dictionaries with debtor, creditor, and amount owed.
         """
-        con = self._get_connection()
-        cur = con.cursor()
-        cur.execute("""
-            SELECT
-                debtor.name as debtor_name,
-                creditor.name as creditor_name,
-                SUM(dp.cost) as amount_owed
-            FROM drink_purchases dp
-            JOIN users debtor ON dp.user_id = debtor.user_id
-            JOIN users creditor ON dp.charged_to_orderer_id = creditor.user_id
-            WHERE debtor.user_id != creditor.user_id
-            GROUP BY debtor.user_id, creditor.user_id
-            HAVING amount_owed > 0
-            ORDER BY amount_owed DESC
-        """)
+        with self._read_conn() as con:
+            cur = con.execute(_SQL_USER_DEBTS)
+            return self._rows_as_dicts(cur)
 
-        columns = [desc[0] for desc in cur.description]
-        rows = cur.fetchall()
-        con.close()
 
-        return [dict(zip(columns, row)) for row in rows]
+#################################
+#        Async Facade           #
+#################################
+class AsyncDurstDB(BaseModel):
+    """
+    Asyncio front end to `DurstDB` for use from event loops.
+
+    Every call runs the matching `DurstDB` method in a worker thread via
+    `asyncio.to_thread`, so a query never blocks the loop. Reads run
+    concurrently on the reader pool, writes are serialized on the writer.
+    The schema is set up synchronously when the instance is created.
+
+    Example:
+        >>> db = AsyncDurstDB(db_file="/path/to/app.db")
+        >>> purchase_id = await db.add_purchase("alice", "Cola")
+    """
+
+    db_file: str = DB_FILE
+
+    _db: DurstDB = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        """
+        Open the underlying synchronous database manager.
+        """
+        self._db = DurstDB(db_file=self.db_file)
+
+    @property
+    def sync(self) -> DurstDB:
+        """The wrapped synchronous database manager."""
+        return self._db
+
+    async def close(self) -> None:
+        """Close the pooled connections."""
+        await asyncio.to_thread(self._db.close)
+
+    # Users
+    async def get_user_by_id(self, user_id: int) -> User | None:
+        """See `DurstDB.get_user_by_id`."""
+        return await asyncio.to_thread(self._db.get_user_by_id, user_id)
+
+    async def get_user_by_name(self, name: str) -> User | None:
+        """See `DurstDB.get_user_by_name`."""
+        return await asyncio.to_thread(self._db.get_user_by_name, name)
+
+    async def get_user_id_by_name(self, name: str) -> int | None:
+        """See `DurstDB.get_user_id_by_name`."""
+        return await asyncio.to_thread(self._db.get_user_id_by_name, name)
+
+    async def get_all_users(self) -> list[User]:
+        """See `DurstDB.get_all_users`."""
+        return await asyncio.to_thread(self._db.get_all_users)
+
+    async def add_user(self, name: str, email: str, verbose: bool = True) -> int | None:
+        """See `DurstDB.add_user`."""
+        return await asyncio.to_thread(self._db.add_user, name, email, verbose)
+
+    async def get_user_balance(self, user_id: int) -> float:
+        """See `DurstDB.get_user_balance`."""
+        return await asyncio.to_thread(self._db.get_user_balance, user_id)
+
+    async def get_users_by_names(self, names: list[str]) -> dict[str, User]:
+        """See `DurstDB.get_users_by_names`."""
+        return await asyncio.to_thread(self._db.get_users_by_names, names)
+
+    # Drink types
+    async def get_drink_type_by_name(self, name: str) -> DrinkType | None:
+        """See `DurstDB.get_drink_type_by_name`."""
+        return await asyncio.to_thread(self._db.get_drink_type_by_name, name)
+
+    async def get_drink_type_id_by_name(self, name: str) -> int | None:
+        """See `DurstDB.get_drink_type_id_by_name`."""
+        return await asyncio.to_thread(self._db.get_drink_type_id_by_name, name)
+
+    async def get_all_drink_types(self) -> list[DrinkType]:
+        """See `DurstDB.get_all_drink_types`."""
+        return await asyncio.to_thread(self._db.get_all_drink_types)
+
+    async def add_drink_type(
+        self, name: str, brand: str = "", verbose: bool = True
+    ) -> int | None:
+        """See `DurstDB.add_drink_type`."""
+        return await asyncio.to_thread(self._db.add_drink_type, name, brand, verbose)
+
+    # Stock, purchases and repayments
+    async def stock_new_drinks(
+        self,
+        orderer_id: int,
+        total_cost: float,
+        items_list: list[tuple[int, float, int]],
+        verbose: bool = True,
+    ) -> int:
+        """See `DurstDB.stock_new_drinks`."""
+        return await asyncio.to_thread(
+            self._db.stock_new_drinks, orderer_id, total_cost, items_list, verbose
+        )
+
+    async def add_purchase(self, user: str, drink: str) -> int:
+        """See `DurstDB.add_purchase`."""
+        return await asyncio.to_thread(self._db.add_purchase, user, drink)
+
+    async def add_purchases_many(self, purchases: list[tuple[str, str]]) -> list[int]:
+        """See `DurstDB.add_purchases_many`."""
+        return await asyncio.to_thread(self._db.add_purchases_many, purchases)
+
+    async def add_repayment(
+        self, payer_id: int, receiver_id: int, amount: float
+    ) -> int:
+        """See `DurstDB.add_repayment`."""
+        return await asyncio.to_thread(
+            self._db.add_repayment, payer_id, receiver_id, amount
+        )
+
+    # Reports
+    async def get_recent_purchases(self, limit: int = 50) -> list[dict]:
+        """See `DurstDB.get_recent_purchases`."""
+        return await asyncio.to_thread(self._db.get_recent_purchases, limit)
+
+    async def get_dashboard_snapshot(self, limit: int = 50) -> DashboardSnapshot:
+        """See `DurstDB.get_dashboard_snapshot`."""
+        return await asyncio.to_thread(self._db.get_dashboard_snapshot, limit)
+
+    async def get_stock_status(self) -> list[dict]:
+        """See `DurstDB.get_stock_status`."""
+        return await asyncio.to_thread(self._db.get_stock_status)
+
+    async def get_stock_status_by_name(self) -> dict[str, dict]:
+        """See `DurstDB.get_stock_status_by_name`."""
+        return await asyncio.to_thread(self._db.get_stock_status_by_name)
+
+    async def get_user_debts(self) -> list[dict]:
+        """See `DurstDB.get_user_debts`."""
+        return await asyncio.to_thread(self._db.get_user_debts)
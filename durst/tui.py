@@ -1,3 +1,5 @@
+import asyncio
+
 from rich.text import Text
 from textual import on
 from textual.app import App, ComposeResult
@@ -16,7 +18,13 @@ from textual.widgets import (
     TabPane,
 )
 
-from durst.db import DurstDB
+from durst.db import DurstDB, User
+
+# Column headers of the overview tables; the underlying queries are fixed.
+PURCHASE_HEADERS = ("#", "User", "Drink", "Cost", "Date", "Ordered by")
+STOCK_HEADERS = ("Drink", "Brand", "Remaining")
+BALANCE_HEADERS = ("Name", "Email", "Balance")
+DEBT_HEADERS = ("Debtor", "Creditor", "Owed")
 
 
 def money(amount: float) -> Text:
@@ -143,6 +151,8 @@ class DurstApp(App):
     def __init__(self, db_file: str = "sqlite.db"):
         super().__init__()
         self.db_file = db_file
+        # Opened in on_mount, so it is still None if mounting failed early.
+        self.db: DurstDB | None = None
 
     def compose(self) -> ComposeResult:
         """Create child widgets for the app."""
@@ -158,70 +168,71 @@ class DurstApp(App):
                 yield DataTable(id="debts-table")
         yield Footer()
 
-    def on_mount(self) -> None:
+    async def on_mount(self) -> None:
         """Called when the app is mounted to the screen."""
         # Ensure the database file and tables are created.
         self.db = DurstDB(db_file=self.db_file)
-        for table in self.query(DataTable):
+        for table_id, headers in (
+            ("#purchases-table", PURCHASE_HEADERS),
+            ("#stock-table", STOCK_HEADERS),
+            ("#balances-table", BALANCE_HEADERS),
+            ("#debts-table", DEBT_HEADERS),
+        ):
+            table = self.query_one(table_id, DataTable)
             table.cursor_type = "row"
-        self.action_refresh()
+            table.add_columns(*headers)
+        await self.action_refresh()
+
+    def on_unmount(self) -> None:
+        """Release the database connection when the app shuts down."""
+        if self.db is not None:
+            self.db.close()
 
     ##########################################
     #             Table Refresh              #
     ##########################################
-    def action_refresh(self) -> None:
-        """Reload all tables from the database."""
-        self._refresh_purchases()
-        self._refresh_stock()
-        self._refresh_balances()
-        self._refresh_debts()
+    async def action_refresh(self) -> None:
+        """Reload all tables from the database.
+
+        The reports are read as one snapshot in a worker thread, so a slow
+        query never blocks input or redraws and the tabs always agree.
+        """
+        snapshot = await asyncio.to_thread(self.db.get_dashboard_snapshot, 50)
+        self._refresh_purchases(snapshot.recent_purchases)
+        self._refresh_stock(snapshot.stock)
+        self._refresh_balances(snapshot.users)
+        self._refresh_debts(snapshot.debts)
 
     @staticmethod
-    def _fill_table(table: DataTable, headers: list[str], rows: list[tuple]) -> None:
-        """Replace the contents of a DataTable with fresh headers and rows."""
-        table.clear(columns=True)
-        table.add_columns(*headers)
+    def _fill_table(table: DataTable, rows: list[tuple]) -> None:
+        """Replace the rows of a DataTable, keeping the columns added on mount."""
+        table.clear()
         table.add_rows(rows)
 
-    def _refresh_purchases(self) -> None:
-        purchases = self.db.get_recent_purchases(limit=50)
+    def _refresh_purchases(self, purchases: list[tuple]) -> None:
         self._fill_table(
             self.query_one("#purchases-table", DataTable),
-            ["#", "User", "Drink", "Cost", "Date", "Ordered by"],
             [
-                (
-                    p["purchase_id"],
-                    p["user_name"],
-                    p["drink_name"],
-                    f"{p['cost']:.2f} €",
-                    p["purchase_date"],
-                    p["orderer_name"],
-                )
-                for p in purchases
+                (purchase_id, user, drink, f"{cost:.2f} €", date, orderer)
+                for purchase_id, user, drink, cost, date, orderer in purchases
             ],
         )
 
-    def _refresh_stock(self) -> None:
-        stock = self.db.get_stock_status()
+    def _refresh_stock(self, stock: list[dict]) -> None:
         self._fill_table(
             self.query_one("#stock-table", DataTable),
-            ["Drink", "Brand", "Remaining"],
             [(s["drink_name"], s["brand"] or "", s["total_remaining"]) for s in stock],
         )
 
-    def _refresh_balances(self) -> None:
-        users = self.db.get_all_users()
+    def _refresh_balances(self, users: list[User]) -> None:
         self._fill_table(
             self.query_one("#balances-table", DataTable),
-            ["Name", "Email", "Balance"],
             [(u.name, u.email, money(u.balance)) for u in users],
         )
 
-    def _refresh_debts(self) -> None:
-        debts = self.db.get_user_debts()
+    def _refresh_debts(self, debts: list[dict]) -> None:
         self._fill_table(
             self.query_one("#debts-table", DataTable),
-            ["Debtor", "Creditor", "Owed"],
             [
                 (d["debtor_name"], d["creditor_name"], f"{d['amount_owed']:.2f} €")
                 for d in debts
@@ -231,14 +242,14 @@ class DurstApp(App):
     ##########################################
     #               Actions                  #
     ##########################################
-    def action_buy(self) -> None:
+    async def action_buy(self) -> None:
         """Open the buy dialog."""
-        users = [u.name for u in self.db.get_all_users()]
-        drinks = [
-            s["drink_name"]
-            for s in self.db.get_stock_status()
-            if s["total_remaining"] > 0
-        ]
+        all_users, stock = await asyncio.gather(
+            asyncio.to_thread(self.db.get_all_users),
+            asyncio.to_thread(self.db.get_stock_status),
+        )
+        users = [u.name for u in all_users]
+        drinks = [s["drink_name"] for s in stock if s["total_remaining"] > 0]
         if not users:
             self.notify("No users yet — press 'u' to add one.", severity="warning")
             return
@@ -249,7 +260,7 @@ class DurstApp(App):
             )
             return
 
-        def on_result(result: tuple[str, str] | None) -> None:
+        async def on_result(result: tuple[str, str] | None) -> None:
             if result is None:
                 return
             user, drink = result
@@ -259,14 +270,14 @@ class DurstApp(App):
                 self.notify(str(e), severity="error")
                 return
             self.notify(f"{user} bought a {drink}. Prost! 🍻")
-            self.action_refresh()
+            await self.action_refresh()
 
         self.push_screen(BuyScreen(users, drinks), on_result)
 
     def action_add_user(self) -> None:
         """Open the add-user dialog."""
 
-        def on_result(result: tuple[str, str] | None) -> None:
+        async def on_result(result: tuple[str, str] | None) -> None:
             if result is None:
                 return
             name, email = result
@@ -279,7 +290,7 @@ class DurstApp(App):
                 return
             self.db.add_user(name, email, verbose=False)
             self.notify(f"Added user {name}.")
-            self.action_refresh()
+            await self.action_refresh()
 
         self.push_screen(AddUserScreen(), on_result)
 
@@ -1,21 +1,18 @@
-import os
-import tempfile
+import sqlite3
+from contextlib import closing
 
 import pytest
 from click.testing import CliRunner
 
+from durst import db as db_module
 from durst.cli import cli
 from durst.db import DurstDB
 
 
 @pytest.fixture
-def db_path():
+def db_path(tmp_path):
     """Create a temporary database file path for testing."""
-    fd, path = tempfile.mkstemp(suffix=".db")
-    os.close(fd)
-    yield path
-    if os.path.exists(path):
-        os.remove(path)
+    return str(tmp_path / "durst.db")
 
 
 @pytest.fixture
@@ -139,6 +136,19 @@ class TestStockCommands:
         assert result.exit_code != 0
         assert "User not found" in result.output
 
+    def test_stock_add_reports_database_error(
+        self, runner, populated_db_path, monkeypatch
+    ):
+        monkeypatch.setattr(db_module, "BUSY_TIMEOUT", 0.1)
+        with closing(sqlite3.connect(populated_db_path, isolation_level=None)) as other:
+            # Another writer holds the lock for the whole command
+            other.execute("BEGIN IMMEDIATE")
+            result = invoke(
+                runner, populated_db_path, "stock", "add", "Alice", "-i", "Cola:1.50:6"
+            )
+        assert result.exit_code != 0
+        assert "Failed to record the stock order: database is locked" in result.output
+
     def test_stock_add_unknown_drink(self, runner, populated_db_path):
         result = invoke(
             runner, populated_db_path, "stock", "add", "Alice", "-i", "Water:1.00:10"
@@ -276,5 +286,5 @@ class TestDatabaseCreation:
         assert result.exit_code == 0
         assert db_file.exists()
         # The schema should be usable right away.
-        db = DurstDB(db_file=str(db_file))
-        assert db.get_all_users() == []
+        with closing(DurstDB(db_file=str(db_file))) as db:
+            assert db.get_all_users() == []
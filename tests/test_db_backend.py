@@ -1,51 +1,55 @@
-import os
-import tempfile
+import asyncio
+import copy
+import sqlite3
+import threading
+from contextlib import closing
 
 import pytest
 
-from durst.db import DrinkType, DurstDB, User
+from durst import db as db_module
+from durst.db import AsyncDurstDB, DrinkType, DurstDB, User
 
 
 @pytest.fixture
 def temp_db():
-    """Create a temporary database for testing."""
-    # Create a temporary file
-    fd, db_path = tempfile.mkstemp(suffix=".db")
-    os.close(fd)
-
-    yield DurstDB(db_file=db_path)
-    # Cleanup: remove the temporary database file
-    if os.path.exists(db_path):
-        os.remove(db_path)
+    """Create a private in-memory database for testing."""
+    with closing(DurstDB(db_file=":memory:")) as db:
+        yield db
 
 
 @pytest.fixture
-def populated_db(temp_db: DurstDB):
-    """Create a database populated with test data."""
-    db = temp_db
-
-    # Add users
-    alice_id = db.add_user("Alice", "alice@example.com", verbose=False)
-    bob_id = db.add_user("Bob", "bob@example.com", verbose=False)
-    charlie_id = db.add_user("Charlie", "charlie@example.com", verbose=False)
-    if alice_id is None or bob_id is None or charlie_id is None:
-        raise ValueError("Failed to create test users.")
-
-    # Add drink types
-    cola_id = db.add_drink_type("Cola", "CocaCola", verbose=False)
-    sprite_id = db.add_drink_type("Sprite", "CocaCola", verbose=False)
-    fanta_id = db.add_drink_type("Fanta", "CocaCola", verbose=False)
-    if cola_id is None or sprite_id is None or fanta_id is None:
-        raise ValueError("Failed to create test drink types.")
-
-    # Stock drinks
-    alice_order = [
-        {"drink_type_id": cola_id, "cost_per_item": 1.50, "quantity": 24},
-        {"drink_type_id": sprite_id, "cost_per_item": 1.25, "quantity": 12},
-        {"drink_type_id": fanta_id, "cost_per_item": 1.30, "quantity": 18},
-    ]
-    total_cost = (1.50 * 24) + (1.25 * 12) + (1.30 * 18)  # 74.40
-    order_id = db.stock_new_drinks(alice_id, total_cost, alice_order, verbose=False)
+def file_db(tmp_path):
+    """Create a temporary on-disk database, for tests of the reader pool."""
+    with closing(DurstDB(db_file=str(tmp_path / "durst.db"))) as db:
+        yield db
+
+
+def populate(db: DurstDB) -> tuple[DurstDB, dict]:
+    """Fill a database with the shared test data."""
+    # One transaction for the whole data set instead of one per insert
+    with db.bulk():
+        # Add users
+        alice_id = db.add_user("Alice", "alice@example.com", verbose=False)
+        bob_id = db.add_user("Bob", "bob@example.com", verbose=False)
+        charlie_id = db.add_user("Charlie", "charlie@example.com", verbose=False)
+        if alice_id is None or bob_id is None or charlie_id is None:
+            raise ValueError("Failed to create test users.")
+
+        # Add drink types
+        cola_id = db.add_drink_type("Cola", "CocaCola", verbose=False)
+        sprite_id = db.add_drink_type("Sprite", "CocaCola", verbose=False)
+        fanta_id = db.add_drink_type("Fanta", "CocaCola", verbose=False)
+        if cola_id is None or sprite_id is None or fanta_id is None:
+            raise ValueError("Failed to create test drink types.")
+
+        # Stock drinks
+        alice_order = [
+            (cola_id, 1.50, 24),
+            (sprite_id, 1.25, 12),
+            (fanta_id, 1.30, 18),
+        ]
+        total_cost = (1.50 * 24) + (1.25 * 12) + (1.30 * 18)  # 74.40
+        order_id = db.stock_new_drinks(alice_id, total_cost, alice_order, verbose=False)
 
     return db, {
         "users": {"alice": alice_id, "bob": bob_id, "charlie": charlie_id},
@@ -54,49 +58,112 @@ def populated_db(temp_db: DurstDB):
     }
 
 
+@pytest.fixture(scope="session")
+def populated_template():
+    """Populate one in-memory database per session for populated_db to copy."""
+    with closing(DurstDB(db_file=":memory:")) as db:
+        yield populate(db)
+
+
+@pytest.fixture
+def populated_db(temp_db: DurstDB, populated_template: tuple[DurstDB, dict]):
+    """Create a database populated with test data.
+
+    The template's pages are copied with the sqlite3 backup API, which is
+    much cheaper than replaying the inserts for every test.
+    """
+    template, data = populated_template
+    with template._write_conn() as src, temp_db._write_conn() as dst:
+        src.backup(dst)
+    return temp_db, copy.deepcopy(data)
+
+
+@pytest.fixture
+def populated_file_db(file_db: DurstDB):
+    """Create an on-disk database populated with test data."""
+    return populate(file_db)
+
+
 class TestUserOperations:
     """Test user management operations."""
 
-    def test_add_user(self, temp_db: DurstDB):
-        """Test adding a new user."""
-        user_id = temp_db.add_user("TestUser", "test@example.com", verbose=False)
-        assert user_id is not None
+    @pytest.mark.parametrize(
+        ("name", "email"),
+        [
+            ("Alice", "alice@example.com"),
+            ("Bob", "bob@example.com"),
+            ("Charlie", "charlie@example.com"),
+        ],
+    )
+    def test_add_and_get_user(self, temp_db: DurstDB, name: str, email: str):
+        """Test adding a user and reading it back by name and by ID."""
+        user_id = temp_db.add_user(name, email, verbose=False)
         assert isinstance(user_id, int)
 
+        by_name = temp_db.get_user_by_name(name)
+        assert by_name is not None
+        assert (by_name.user_id, by_name.name, by_name.email) == (user_id, name, email)
+        assert by_name.balance == 0.0
+
+        assert temp_db.get_user_by_id(user_id) == by_name
+
     def test_add_duplicate_user_email(self, temp_db: DurstDB):
         """Test that adding a user with duplicate email returns existing ID."""
         user_id_1 = temp_db.add_user("User1", "duplicate@example.com", verbose=False)
         user_id_2 = temp_db.add_user("User2", "duplicate@example.com", verbose=False)
         assert user_id_1 == user_id_2
 
-    def test_get_user_by_name(self, temp_db: DurstDB):
-        """Test retrieving a user by name."""
-        temp_db.add_user("Alice", "alice@example.com", verbose=False)
-        user = temp_db.get_user_by_name("Alice")
-        assert user is not None
-        assert user.name == "Alice"
-        assert user.email == "alice@example.com"
-        assert user.balance == 0.0
-
-    def test_get_user_by_id(self, temp_db: DurstDB):
-        """Test retrieving a user by ID."""
-        user_id = temp_db.add_user("Bob", "bob@example.com", verbose=False)
-        assert user_id is not None, "Failed to create test user Bob."
-        user = temp_db.get_user_by_id(user_id)
-        assert user is not None
-        assert user.user_id == user_id
-        assert user.name == "Bob"
+    def test_add_user_logs_instead_of_printing(
+        self, temp_db: DurstDB, caplog: pytest.LogCaptureFixture, capsys
+    ):
+        """Test that verbose writes report through logging, not stdout."""
+        with caplog.at_level("DEBUG", logger="durst.db"):
+            temp_db.add_user("Alice", "alice@example.com")
 
-    def test_get_all_users(self, temp_db: DurstDB):
+        assert "Added user Alice" in caplog.text
+        assert capsys.readouterr().out == ""
+
+    def test_user_names_need_not_be_unique(self, temp_db: DurstDB):
+        """Test that two users may share a name as long as the emails differ."""
+        user_id_1 = temp_db.add_user("Alex", "alex@example.com", verbose=False)
+        user_id_2 = temp_db.add_user("Alex", "alex@example.org", verbose=False)
+        assert user_id_1 != user_id_2
+
+    def test_id_lookups_follow_renames(self, populated_db: tuple[DurstDB, dict]):
+        """Test that name to id lookups see renames made after a first lookup."""
+        db, data = populated_db
+        assert db.get_user_id_by_name("Bob") == data["users"]["bob"]
+        assert db.get_drink_type_id_by_name("Cola") == data["drinks"]["cola"]
+
+        with db._transaction() as con:
+            con.execute("UPDATE users SET name = 'Robert' WHERE name = 'Bob'")
+            con.execute("UPDATE drink_types SET name = 'Coke' WHERE name = 'Cola'")
+
+        assert db.get_user_id_by_name("Bob") is None
+        assert db.get_user_id_by_name("Robert") == data["users"]["bob"]
+        assert db.get_drink_type_id_by_name("Cola") is None
+        assert db.get_drink_type_id_by_name("Coke") == data["drinks"]["cola"]
+
+    def test_get_all_users(self, populated_db: tuple[DurstDB, dict]):
         """Test retrieving all users."""
-        temp_db.add_user("Alice", "alice@example.com", verbose=False)
-        temp_db.add_user("Bob", "bob@example.com", verbose=False)
-        temp_db.add_user("Charlie", "charlie@example.com", verbose=False)
+        db, _ = populated_db
 
-        users = temp_db.get_all_users()
+        users = db.get_all_users()
         assert len(users) == 3
         assert all(isinstance(user, User) for user in users)
-        assert sorted([u.name for u in users]) == ["Alice", "Bob", "Charlie"]
+        assert {u.name for u in users} == {"Alice", "Bob", "Charlie"}
+
+    def test_iter_all_users(self, populated_db: tuple[DurstDB, dict]):
+        """Test streaming users while running other queries in between."""
+        db, _ = populated_db
+
+        names = []
+        for user in db.iter_all_users():
+            # Other calls must still work while the iterator holds a reader
+            assert db.get_user_id_by_name(user.name) == user.user_id
+            names.append(user.name)
+
+        assert names == ["Alice", "Bob", "Charlie"]
 
     def test_user_balance_methods(self, temp_db: DurstDB):
         """Test User class helper methods."""
@@ -108,50 +175,67 @@ class TestUserOperations:
         # Initial balance should be 0
         assert not user.is_in_debt()
         assert not user.is_owed()
+        assert user.model_dump()["balance"] == 0.0
+
+    def test_get_users_by_names(self, populated_db: tuple[DurstDB, dict]):
+        """Test fetching several users by name at once."""
+        db, data = populated_db
+        db.add_user("Bob", "bob2@example.com", verbose=False)
+
+        users = db.get_users_by_names(["Alice", "Bob", "Bob", "Nobody"])
+
+        assert set(users) == {"Alice", "Bob"}
+        assert users["Alice"] == db.get_user_by_name("Alice")
+        # Shared names resolve to the oldest user
+        assert users["Bob"].user_id == data["users"]["bob"]
+        assert db.get_users_by_names([]) == {}
 
 
 class TestDrinkTypeOperations:
     """Test drink type management operations."""
 
-    def test_add_drink_type(self, temp_db: DurstDB):
-        """Test adding a new drink type."""
-        drink_id = temp_db.add_drink_type("Cola", "CocaCola", verbose=False)
-        assert drink_id is not None
+    @pytest.mark.parametrize(
+        ("name", "brand"),
+        [("Cola", "CocaCola"), ("Sprite", "CocaCola"), ("Fanta", "CocaCola")],
+    )
+    def test_add_and_get_drink_type(self, temp_db: DurstDB, name: str, brand: str):
+        """Test adding a drink type and reading it back by name and by ID."""
+        drink_id = temp_db.add_drink_type(name, brand, verbose=False)
         assert isinstance(drink_id, int)
 
+        by_name = temp_db.get_drink_type_by_name(name)
+        assert by_name is not None
+        assert (by_name.drink_type_id, by_name.name, by_name.brand) == (
+            drink_id,
+            name,
+            brand,
+        )
+
+        assert temp_db.get_drink_type_by_id(drink_id) == by_name
+
     def test_add_duplicate_drink_type(self, temp_db: DurstDB):
         """Test that adding duplicate drink type returns existing ID."""
         drink_id_1 = temp_db.add_drink_type("Cola", "CocaCola", verbose=False)
         drink_id_2 = temp_db.add_drink_type("Cola", "Pepsi", verbose=False)
         assert drink_id_1 == drink_id_2
 
-    def test_get_drink_type_by_name(self, temp_db: DurstDB):
-        """Test retrieving a drink type by name."""
-        temp_db.add_drink_type("Sprite", "CocaCola", verbose=False)
-        drink = temp_db.get_drink_type_by_name("Sprite")
-        assert drink is not None
-        assert drink.name == "Sprite"
-        assert drink.brand == "CocaCola"
-
-    def test_get_drink_type_by_id(self, temp_db: DurstDB):
-        """Test retrieving a drink type by ID."""
-        drink_id = temp_db.add_drink_type("Fanta", "CocaCola", verbose=False)
-        assert drink_id is not None, "Failed to create test drink type Fanta."
-        drink = temp_db.get_drink_type_by_id(drink_id)
-        assert drink is not None
-        assert drink.drink_type_id == drink_id
-        assert drink.name == "Fanta"
-
-    def test_get_all_drink_types(self, temp_db: DurstDB):
-        """Test retrieving all drink types."""
+    def test_drink_type_name_is_unique(self, temp_db: DurstDB):
+        """Test that the schema itself rejects a second drink type with the same name."""
         temp_db.add_drink_type("Cola", "CocaCola", verbose=False)
-        temp_db.add_drink_type("Sprite", "CocaCola", verbose=False)
-        temp_db.add_drink_type("Fanta", "CocaCola", verbose=False)
+        with temp_db._write_conn() as con, pytest.raises(sqlite3.IntegrityError):
+            con.execute(
+                "INSERT INTO drink_types (name, brand) VALUES (?, ?)",
+                ("Cola", "Pepsi"),
+            )
+
+    def test_get_all_drink_types(self, populated_db: tuple[DurstDB, dict]):
+        """Test retrieving all drink types."""
+        db, _ = populated_db
 
-        drinks = temp_db.get_all_drink_types()
+        drinks = db.get_all_drink_types()
         assert len(drinks) == 3
         assert all(isinstance(drink, DrinkType) for drink in drinks)
-        assert sorted([d.name for d in drinks]) == ["Cola", "Fanta", "Sprite"]
+        assert {d.name for d in drinks} == {"Cola", "Fanta", "Sprite"}
 
 
 class TestStockOperations:
@@ -164,13 +248,85 @@ class TestStockOperations:
         cola_id = temp_db.add_drink_type("Cola", "CocaCola", verbose=False)
         assert cola_id is not None, "Failed to create test drink type Cola."
 
+        order_items = [(cola_id, 1.50, 24)]
+        order_id = temp_db.stock_new_drinks(user_id, 36.0, order_items, verbose=False)
+
+        assert order_id is not None
+        assert isinstance(order_id, int)
+
+    def test_stock_new_drinks_from_dicts(self, temp_db: DurstDB):
+        """Test the dict-based wrapper around stock_new_drinks."""
+        user_id = temp_db.add_user("Alice", "alice@example.com", verbose=False)
+        cola_id = temp_db.add_drink_type("Cola", "CocaCola", verbose=False)
+
         order_items = [
             {"drink_type_id": cola_id, "cost_per_item": 1.50, "quantity": 24}
         ]
-        order_id = temp_db.stock_new_drinks(user_id, 36.0, order_items, verbose=False)
+        order_id = temp_db.stock_new_drinks_from_dicts(
+            user_id, 36.0, order_items, verbose=False
+        )
 
         assert order_id is not None
-        assert isinstance(order_id, int)
+        stock = temp_db.get_stock_status()
+        assert stock[0]["drink_name"] == "Cola"
+        assert stock[0]["total_remaining"] == 24
+
+    def test_stock_error_is_raised(self, populated_db: tuple[DurstDB, dict]):
+        """Test that a failed stock order raises and leaves the stock unchanged."""
+        db, data = populated_db
+        before = db.get_stock_status()
+
+        with pytest.raises(sqlite3.IntegrityError):
+            db.stock_new_drinks(9999, 1.5, [(data["drinks"]["cola"], 1.5, 1)])
+        with pytest.raises(sqlite3.IntegrityError):
+            db.stock_many_orders([(9999, 1.5, [(data["drinks"]["cola"], 1.5, 1)])])
+
+        assert db.get_stock_status() == before
+
+    def test_stock_many_orders(self, populated_db: tuple[DurstDB, dict]):
+        """Test stocking several orders in one call."""
+        db, data = populated_db
+        cola_id = data["drinks"]["cola"]
+        sprite_id = data["drinks"]["sprite"]
+
+        orders = [
+            (
+                data["users"]["bob"],
+                15.0,
+                [(cola_id, 1.50, 10)],
+            ),
+            (
+                data["users"]["charlie"],
+                12.5,
+                [
+                    (cola_id, 1.00, 5),
+                    (sprite_id, 1.25, 6),
+                ],
+            ),
+        ]
+        order_ids = db.stock_many_orders(orders, verbose=False)
+
+        assert order_ids is not None
+        assert len(order_ids) == 2
+        assert order_ids[0] < order_ids[1]
+
+        stock = db.get_stock_status_by_name()
+        assert stock["Cola"]["total_remaining"] == 24 + 10 + 5
+        assert stock["Sprite"]["total_remaining"] == 12 + 6
+
+    def test_stock_order_spanning_insert_chunks(
+        self, temp_db: DurstDB, monkeypatch: pytest.MonkeyPatch
+    ):
+        """Test that orders larger than one multi-row INSERT are split correctly."""
+        monkeypatch.setattr(db_module, "BATCH_INSERT_CHUNK", 2)
+        user_id = temp_db.add_user("Alice", "alice@example.com", verbose=False)
+        cola_id = temp_db.add_drink_type("Cola", "CocaCola", verbose=False)
+
+        order_items = [(cola_id, 1.00, qty) for qty in range(1, 6)]
+        order_id = temp_db.stock_new_drinks(user_id, 15.0, order_items, verbose=False)
+
+        assert order_id is not None
+        assert temp_db.get_stock_status()[0]["total_remaining"] == 15
 
     def test_get_stock_status(self, populated_db: tuple[DurstDB, dict]):
         """Test retrieving stock status."""
@@ -187,6 +343,200 @@ class TestStockOperations:
         assert stock_dict["Sprite"] == 12
         assert stock_dict["Fanta"] == 18
 
+    def test_stock_counter_follows_purchases(self, populated_db: tuple[DurstDB, dict]):
+        """Test that the cached stock counter tracks stocking and purchases."""
+        db, data = populated_db
+        bob_id, cola_id = data["users"]["bob"], data["drinks"]["cola"]
+        db.add_purchase("Bob", "Cola")
+        db.stock_new_drinks(bob_id, 6.0, [(cola_id, 1.0, 6)], verbose=False)
+
+        stock = db.get_stock_status_by_name()
+        assert stock["Cola"]["total_remaining"] == 24 - 1 + 6
+
+    def test_stock_counter_seeded_on_upgrade(self, populated_db: tuple[DurstDB, dict]):
+        """Test that databases without the stock counter get it seeded."""
+        db, _ = populated_db
+        db.add_purchase("Bob", "Cola")
+        with db._transaction() as con:
+            for trigger in ("trg_stock_insert", "trg_stock_update", "trg_stock_delete"):
+                con.execute(f"DROP TRIGGER {trigger}")
+            con.execute("ALTER TABLE drink_types DROP COLUMN current_stock")
+            con.execute("PRAGMA user_version = 0")
+
+        db.setup_database()
+
+        stock = {s["drink_name"]: s["total_remaining"] for s in db.get_stock_status()}
+        assert stock == {"Cola": 23, "Sprite": 12, "Fanta": 18}
+
+
+class TestTransactions:
+    """Test transaction handling on the shared connection."""
+
+    def test_reads_do_not_open_transaction(self, populated_db: tuple[DurstDB, dict]):
+        """Test that read helpers leave the connection in autocommit mode."""
+        db, _ = populated_db
+        db.get_all_users()
+        db.get_user_id_by_name("Alice")
+        db.get_stock_status()
+        with db._write_conn() as con:
+            assert not con.in_transaction
+
+    def test_failed_write_rolls_back(self, populated_db: tuple[DurstDB, dict]):
+        """Test that a failing write leaves no open transaction behind."""
+        db, _ = populated_db
+        with pytest.raises(ValueError):
+            db.add_purchase("Nobody", "Cola")
+        with db._write_conn() as con:
+            assert not con.in_transaction
+
+    def test_transaction_takes_write_lock_up_front(self, file_db: DurstDB):
+        """Test that other writers are locked out as soon as a transaction begins."""
+        other = sqlite3.connect(file_db.db_file, timeout=0, isolation_level=None)
+        try:
+            with file_db._transaction():
+                with pytest.raises(sqlite3.OperationalError, match="locked"):
+                    other.execute("BEGIN IMMEDIATE")
+        finally:
+            other.close()
+
+    def test_bulk_commits_once(self, populated_db: tuple[DurstDB, dict]):
+        """Test that writes inside bulk() share one transaction."""
+        db, data = populated_db
+
+        statements = []
+        with db.bulk() as con:
+            con.set_trace_callback(statements.append)
+            try:
+                db.add_user("Dave", "dave@example.com", verbose=False)
+                db.add_purchase("Dave", "Cola")
+                db.add_repayment(data["users"]["bob"], data["users"]["alice"], 1.0)
+            finally:
+                con.set_trace_callback(None)
+
+        assert not any(sql.startswith("BEGIN") for sql in statements)
+        assert not any(sql == "COMMIT" for sql in statements)
+        assert db.get_user_by_name("Dave") is not None
+
+    def test_bulk_rolls_back_on_error(self, populated_db: tuple[DurstDB, dict]):
+        """Test that an error inside bulk() undoes every write in the block."""
+        db, _ = populated_db
+
+        with pytest.raises(ValueError):
+            with db.bulk():
+                db.add_user("Dave", "dave@example.com", verbose=False)
+                db.add_purchase("Dave", "Water")
+
+        assert db.get_user_by_name("Dave") is None
+
+    def test_nested_transaction_uses_savepoint(
+        self, populated_db: tuple[DurstDB, dict]
+    ):
+        """Test that a failing nested block only undoes its own changes."""
+        db, _ = populated_db
+        with db._transaction():
+            db.add_user("Dave", "dave@example.com", verbose=False)
+            with pytest.raises(ValueError):
+                db.add_purchase("Nobody", "Cola")
+        assert db.get_user_by_name("Dave") is not None
+
+
+class TestConnectionPool:
+    """Test the reader pool and the writer connection."""
+
+    def test_connection_is_reused(self, file_db: DurstDB):
+        """Test that consecutive calls get the same connection back."""
+        with file_db._read_conn() as first:
+            pass
+        with file_db._read_conn() as second:
+            pass
+        assert first is second
+
+    def test_nested_checkout_reuses_connection(self, file_db: DurstDB):
+        """Test that a nested checkout in the same thread shares the connection."""
+        with file_db._read_conn() as outer, file_db._read_conn() as inner:
+            assert outer is inner
+
+    def test_threads_get_own_connections(self, file_db: DurstDB):
+        """Test that concurrent checkouts from other threads use other connections."""
+        seen = []
+
+        def checkout():
+            with file_db._read_conn() as con:
+                seen.append(con)
+
+        with file_db._read_conn() as outer:
+            thread = threading.Thread(target=checkout)
+            thread.start()
+            thread.join()
+        assert seen and seen[0] is not outer
+
+    def test_suspended_iterator_does_not_block_other_threads(self, temp_db: DurstDB):
+        """Test that a paused generator on :memory: does not hold the writer lock."""
+        temp_db.add_user("Alice", "alice@example.com", verbose=False)
+        temp_db.add_user("Bob", "bob@example.com", verbose=False)
+        users = temp_db.iter_all_users()
+        next(users)
+        seen = []
+
+        def lookup():
+            seen.append(temp_db.get_user_id_by_name("Bob"))
+
+        thread = threading.Thread(target=lookup, daemon=True)
+        thread.start()
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+        assert seen == [2]
+        assert [user.name for user in users] == ["Bob"]
+
+    def test_readers_are_query_only(self, file_db: DurstDB):
+        """Test that reader connections refuse writes."""
+        with file_db._read_conn() as con:
+            with pytest.raises(sqlite3.OperationalError, match="readonly"):
+                con.execute("INSERT INTO drink_types (name) VALUES ('Cola')")
+
+    def test_reads_in_transaction_use_writer(self, file_db: DurstDB):
+        """Test that reads inside a transaction see its uncommitted writes."""
+        with file_db._transaction() as writer:
+            user_id = file_db.add_user("Alice", "alice@example.com", verbose=False)
+            with file_db._read_conn() as con:
+                assert con is writer
+            assert file_db.get_user_id_by_name("Alice") == user_id
+
+    def test_connections_wait_for_locks(self, file_db: DurstDB):
+        """Test that connections wait on a locked database instead of failing."""
+        with file_db._read_conn() as reader, file_db._write_conn() as writer:
+            expected = int(db_module.BUSY_TIMEOUT * 1000)
+            assert reader.execute("PRAGMA busy_timeout").fetchone()[0] == expected
+            assert writer.execute("PRAGMA busy_timeout").fetchone()[0] == expected
+
+    def test_close_reopens_on_demand(self, populated_file_db: tuple[DurstDB, dict]):
+        """Test that the manager keeps working after close()."""
+        db, _ = populated_file_db
+        db.close()
+        assert db.get_user_id_by_name("Alice") is not None
+
+    def test_schema_version_skips_ddl(self, file_db: DurstDB):
+        """Test that reopening an up-to-date database does not rerun the DDL."""
+        with file_db._read_conn() as con:
+            version = con.execute("PRAGMA user_version").fetchone()[0]
+        assert version == db_module.SCHEMA_VERSION
+
+        with file_db._transaction() as con:
+            con.execute("DROP INDEX idx_purchase_log_date")
+
+        reopened = DurstDB(db_file=file_db.db_file)
+        with closing(reopened), reopened._read_conn() as con:
+            row = con.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'idx_purchase_log_date'"
+            ).fetchone()
+        assert row is None
+
+    def test_memory_database(self):
+        """Test that an in-memory database shares one connection."""
+        with closing(DurstDB(db_file=":memory:")) as db:
+            user_id = db.add_user("Alice", "alice@example.com", verbose=False)
+            assert db.get_user_id_by_name("Alice") == user_id
+
 
 class TestPurchaseOperations:
     """Test purchase operations."""
@@ -229,26 +579,29 @@ class TestPurchaseOperations:
         assert bob.balance == initial_bob_balance - 1.50
         assert bob.is_in_debt()
 
+    def test_purchase_from_own_batch(self, populated_db: tuple[DurstDB, dict]):
+        """Test that buying from one's own stock leaves the balance unchanged."""
+        db, _ = populated_db
+
+        # Alice ordered the stock, so she both pays and is credited
+        db.add_purchase("Alice", "Cola")
+
+        alice = db.get_user_by_name("Alice")
+        assert alice is not None, "Failed to retrieve Alice."
+        assert alice.balance == 0.0
+
     def test_purchase_reduces_stock(self, populated_db: tuple[DurstDB, dict]):
         """Test that purchases reduce stock quantities."""
         db, _ = populated_db
 
         # Get initial stock
-        initial_stock = db.get_stock_status()
-        initial_cola = next(
-            item for item in initial_stock if item["drink_name"] == "Cola"
-        )
-        initial_qty = initial_cola["total_remaining"]
+        initial_qty = db.get_stock_status_by_name()["Cola"]["total_remaining"]
 
         # Bob buys a Cola
         db.add_purchase("Bob", "Cola")
 
         # Check updated stock
-        updated_stock = db.get_stock_status()
-        updated_cola = next(
-            item for item in updated_stock if item["drink_name"] == "Cola"
-        )
-
+        updated_cola = db.get_stock_status_by_name()["Cola"]
         assert updated_cola["total_remaining"] == initial_qty - 1
 
     def test_multiple_purchases(self, populated_db: tuple[DurstDB, dict]):
@@ -262,21 +615,95 @@ class TestPurchaseOperations:
         db.add_purchase("Charlie", "Fanta")
 
         # Check balances
+        users = db.get_users_by_names(["Alice", "Bob", "Charlie"])
+        alice, bob, charlie = users["Alice"], users["Bob"], users["Charlie"]
+
+        # Bob bought Cola ($1.50) and Sprite ($1.25) = -$2.75
+        assert bob.balance_cents == -275
+
+        # Charlie bought Cola ($1.50) and Fanta ($1.30) = -$2.80
+        assert charlie.balance_cents == -280
+
+        # Alice should be credited for all purchases = +$5.55
+        assert alice.balance_cents == 555
+
+    def test_add_purchases_many(self, populated_db: tuple[DurstDB, dict]):
+        """Test adding several purchases in one call."""
+        db, _ = populated_db
+
+        purchase_ids = db.add_purchases_many(
+            [("Bob", "Cola"), ("Bob", "Sprite"), ("Charlie", "Cola")]
+        )
+        assert len(purchase_ids) == 3
+        assert len(set(purchase_ids)) == 3
+
         bob = db.get_user_by_name("Bob")
-        charlie = db.get_user_by_name("Charlie")
         alice = db.get_user_by_name("Alice")
         assert bob is not None, "Failed to retrieve Bob."
-        assert charlie is not None, "Failed to retrieve Charlie."
         assert alice is not None, "Failed to retrieve Alice."
+        assert bob.balance_cents == -275
+        assert alice.balance_cents == 425
 
-        # Bob bought Cola ($1.50) and Sprite ($1.25) = -$2.75
-        assert abs(bob.balance - (-2.75)) < 0.01
+    def test_add_purchases_many_with_shared_user_name(
+        self, populated_db: tuple[DurstDB, dict]
+    ):
+        """Test that a shared name charges the oldest user, as add_purchase does."""
+        db, data = populated_db
+        newer_bob = db.add_user("Bob", "bob2@example.com", verbose=False)
 
-        # Charlie bought Cola ($1.50) and Fanta ($1.30) = -$2.80
-        assert abs(charlie.balance - (-2.80)) < 0.01
+        db.add_purchases_many([("Bob", "Cola")])
 
-        # Alice should be credited for all purchases = +$5.55
-        assert abs(alice.balance - 5.55) < 0.01
+        assert db.get_user_by_id(data["users"]["bob"]).balance_cents == -150
+        assert db.get_user_by_id(newer_bob).balance_cents == 0
+
+    def test_add_purchases_many_is_atomic(self, populated_db: tuple[DurstDB, dict]):
+        """Test that one bad purchase rolls back the whole batch."""
+        db, _ = populated_db
+
+        with pytest.raises(ValueError, match="User not found"):
+            db.add_purchases_many([("Bob", "Cola"), ("Nobody", "Cola")])
+
+        bob = db.get_user_by_name("Bob")
+        assert bob is not None, "Failed to retrieve Bob."
+        assert bob.balance == 0.0
+        assert db.get_recent_purchases() == []
+
+    def test_open_bulk_resolves_names_in_memory(
+        self, populated_db: tuple[DurstDB, dict]
+    ):
+        """Test that purchases inside open_bulk skip the name lookups."""
+        db, _ = populated_db
+
+        statements = []
+        with db.open_bulk(), db._write_conn() as con:
+            con.set_trace_callback(statements.append)
+            try:
+                purchase_id = db.add_purchase("Bob", "Cola")
+            finally:
+                con.set_trace_callback(None)
+
+        assert purchase_id is not None
+        assert not any("FROM users WHERE name" in sql for sql in statements)
+        bob = db.get_user_by_name("Bob")
+        assert bob is not None, "Failed to retrieve Bob."
+        assert bob.balance == -1.50
+        # The preloaded names are dropped again on exit
+        assert "Charlie" not in db._user_ids
+
+    def test_open_bulk_follows_renames(self, populated_db: tuple[DurstDB, dict]):
+        """Test that a user renamed inside open_bulk is not charged by old name."""
+        db, data = populated_db
+
+        with db.open_bulk():
+            with db._transaction() as con:
+                con.execute("UPDATE users SET name = 'Robert' WHERE name = 'Bob'")
+            with pytest.raises(ValueError, match="User not found: Bob"):
+                db.add_purchase("Bob", "Cola")
+            db.add_purchase("Robert", "Cola")
+
+        robert = db.get_user_by_id(data["users"]["bob"])
+        assert robert is not None, "Failed to retrieve Robert."
+        assert robert.balance_cents == -150
 
     def test_get_recent_purchases(self, populated_db: tuple[DurstDB, dict]):
         """Test retrieving recent purchases."""
@@ -294,6 +721,75 @@ class TestPurchaseOperations:
         assert all("cost" in p for p in recent)
         assert all("orderer_name" in p for p in recent)
 
+    def test_get_recent_purchases_raw(self, populated_db: tuple[DurstDB, dict]):
+        """Test that the raw variant returns the same data as tuples."""
+        db, _ = populated_db
+        db.add_purchase("Bob", "Cola")
+        db.add_purchase("Charlie", "Sprite")
+
+        columns, rows = db.get_recent_purchases_raw(limit=10)
+
+        assert [dict(zip(columns, row)) for row in rows] == db.get_recent_purchases(
+            limit=10
+        )
+
+    def test_iter_recent_purchases(self, populated_file_db: tuple[DurstDB, dict]):
+        """Test that streamed purchases match the collected ones."""
+        db, _ = populated_file_db
+        db.add_purchase("Bob", "Cola")
+        db.add_purchase("Charlie", "Sprite")
+        _, expected = db.get_recent_purchases_raw(limit=10)
+
+        rows = []
+        for row in db.iter_recent_purchases(limit=10):
+            # Writes must still work while the iterator holds a reader
+            db.add_purchase("Alice", "Fanta")
+            rows.append(row)
+
+        assert rows == expected
+
+    def test_recent_purchases_skip_sort(self, populated_db: tuple[DurstDB, dict]):
+        """Test that recent purchases stream from the date index without a sort."""
+        db, _ = populated_db
+
+        with db._read_conn() as con:
+            plan = [
+                row[3]
+                for row in con.execute(
+                    "EXPLAIN QUERY PLAN " + db_module._SQL_RECENT_PURCHASES, (50,)
+                )
+            ]
+
+        assert any("idx_purchase_log_date" in step for step in plan)
+        assert not any("TEMP B-TREE" in step for step in plan)
+
+    def test_recent_purchases_follow_renames(self, populated_db: tuple[DurstDB, dict]):
+        """Test that the purchase log picks up renamed users and drinks."""
+        db, _ = populated_db
+        db.add_purchase("Bob", "Cola")
+
+        with db._transaction() as con:
+            con.execute("UPDATE users SET name = 'Robert' WHERE name = 'Bob'")
+            con.execute("UPDATE users SET name = 'Alicia' WHERE name = 'Alice'")
+            con.execute("UPDATE drink_types SET name = 'Coke' WHERE name = 'Cola'")
+
+        (purchase,) = db.get_recent_purchases()
+        assert purchase["user_name"] == "Robert"
+        assert purchase["orderer_name"] == "Alicia"
+        assert purchase["drink_name"] == "Coke"
+
+    def test_purchase_log_is_backfilled(self, populated_db: tuple[DurstDB, dict]):
+        """Test that an empty purchase log is rebuilt from drink_purchases."""
+        db, _ = populated_db
+        db.add_purchase("Bob", "Cola")
+        expected = db.get_recent_purchases()
+        with db._transaction() as con:
+            con.execute("DELETE FROM purchase_log")
+            con.execute("PRAGMA user_version = 0")
+
+        db.setup_database()
+        assert db.get_recent_purchases() == expected
+
     def test_purchase_no_stock(self, populated_db: tuple[DurstDB, dict]):
         """Test that purchasing when no stock is available raises an error."""
         db, data = populated_db
@@ -304,6 +800,29 @@ class TestPurchaseOperations:
         with pytest.raises(ValueError, match="No stock available"):
             db.add_purchase("Bob", "Water")
 
+    def test_purchase_unknown_names(self, populated_db: tuple[DurstDB, dict]):
+        """Test that unknown users and drinks are reported by name."""
+        db, _ = populated_db
+
+        with pytest.raises(ValueError, match="User not found: Nobody"):
+            db.add_purchase("Nobody", "Cola")
+        with pytest.raises(ValueError, match="Drink type not found: Beer"):
+            db.add_purchase("Bob", "Beer")
+
+    def test_purchase_with_shared_user_name(self, populated_db: tuple[DurstDB, dict]):
+        """Test that a name shared by two users resolves to the oldest one."""
+        db, data = populated_db
+        newer_bob = db.add_user("Bob", "bob2@example.com", verbose=False)
+
+        db.add_purchase("Bob", "Cola")
+
+        assert len(db.get_recent_purchases()) == 1
+        oldest_bob = data["users"]["bob"]
+        assert db.get_user_id_by_name("Bob") == oldest_bob
+        assert db.get_user_by_name("Bob").user_id == oldest_bob
+        assert db.get_user_by_id(oldest_bob).balance_cents == -150
+        assert db.get_user_by_id(newer_bob).balance_cents == 0
+
 
 class TestRepaymentOperations:
     """Test repayment operations."""
@@ -337,8 +856,8 @@ class TestRepaymentOperations:
         assert bob is not None, "Failed to retrieve Bob."
         assert alice is not None, "Failed to retrieve Alice."
 
-        bob_balance_before = bob.balance
-        alice_balance_before = alice.balance
+        bob_cents_before = bob.balance_cents
+        alice_cents_before = alice.balance_cents
 
         # Bob pays Alice $1.00
         bob_id = data["users"]["bob"]
@@ -352,37 +871,143 @@ class TestRepaymentOperations:
         assert alice is not None, "Failed to retrieve Alice."
 
         # Bob settled $1.00 of his debt, so his balance should increase
-        assert abs(bob.balance - (bob_balance_before + 1.00)) < 0.01
+        assert bob.balance_cents == bob_cents_before + 100
 
         # Alice received $1.00 in cash, so she is owed that much less
-        assert abs(alice.balance - (alice_balance_before - 1.00)) < 0.01
-
-    def test_repayment_invalid_amount(self, populated_db: tuple[DurstDB, dict]):
-        """Test that invalid repayment amounts raise errors."""
+        assert alice.balance_cents == alice_cents_before - 100
+
+    @pytest.mark.parametrize(
+        ("payer", "receiver", "amount", "message"),
+        [
+            ("Bob", "Alice", 0, "Amount must be positive"),
+            ("Bob", "Alice", -10, "Amount must be positive"),
+            ("Bob", "Bob", 10.0, "Payer and receiver must be different"),
+        ],
+    )
+    def test_repayment_invalid(
+        self,
+        temp_db: DurstDB,
+        payer: str,
+        receiver: str,
+        amount: float,
+        message: str,
+    ):
+        """Test that invalid repayments raise errors."""
+        ids = {
+            "Alice": temp_db.add_user("Alice", "alice@example.com", verbose=False),
+            "Bob": temp_db.add_user("Bob", "bob@example.com", verbose=False),
+        }
+
+        with pytest.raises(ValueError, match=message):
+            temp_db.add_repayment(ids[payer], ids[receiver], amount)
+
+        assert temp_db.get_user_debts() == []
+
+    def test_repayment_unknown_user(self, populated_db: tuple[DurstDB, dict]):
+        """Test that repaying from or to an unknown user changes nothing."""
         db, data = populated_db
 
         bob_id = data["users"]["bob"]
-        alice_id = data["users"]["alice"]
 
-        with pytest.raises(ValueError, match="Amount must be positive"):
-            db.add_repayment(bob_id, alice_id, 0)
+        with pytest.raises(ValueError, match="Payer not found"):
+            db.add_repayment(9999, bob_id, 5.0)
 
-        with pytest.raises(ValueError, match="Amount must be positive"):
-            db.add_repayment(bob_id, alice_id, -10)
+        with pytest.raises(ValueError, match="Receiver not found"):
+            db.add_repayment(bob_id, 9999, 5.0)
 
-    def test_repayment_same_user(self, populated_db: tuple[DurstDB, dict]):
-        """Test that repaying oneself raises an error."""
-        db, data = populated_db
+        # The balance update of the existing user must have been rolled back
+        bob = db.get_user_by_name("Bob")
+        assert bob is not None, "Failed to retrieve Bob."
+        assert bob.balance == 0.0
 
-        bob_id = data["users"]["bob"]
 
-        with pytest.raises(ValueError, match="Payer and receiver must be different"):
-            db.add_repayment(bob_id, bob_id, 10.0)
+class TestAsyncDurstDB:
+    """Test the asyncio facade."""
+
+    def test_concurrent_calls(self, populated_file_db: tuple[DurstDB, dict]):
+        """Test that reads and writes can be awaited concurrently."""
+        db, _ = populated_file_db
+        adb = AsyncDurstDB(db_file=db.db_file)
+
+        async def run():
+            purchase_ids = await asyncio.gather(
+                adb.add_purchase("Bob", "Cola"),
+                adb.add_purchase("Charlie", "Cola"),
+            )
+            users, stock = await asyncio.gather(
+                adb.get_all_users(), adb.get_stock_status_by_name()
+            )
+            await adb.close()
+            return purchase_ids, users, stock
+
+        purchase_ids, users, stock = asyncio.run(run())
+
+        assert len(set(purchase_ids)) == 2
+        assert [u.name for u in users] == ["Alice", "Bob", "Charlie"]
+        assert stock["Cola"]["total_remaining"] == 22
+
+    def test_errors_propagate(self, populated_file_db: tuple[DurstDB, dict]):
+        """Test that validation errors surface from the awaited call."""
+        db, _ = populated_file_db
+        adb = AsyncDurstDB(db_file=db.db_file)
+
+        with pytest.raises(ValueError, match="User not found"):
+            asyncio.run(adb.add_purchase("Nobody", "Cola"))
+        adb.sync.close()
 
 
 class TestDebtReporting:
     """Test debt reporting and query operations."""
 
+    def test_recompute_balances_from_scratch(self, populated_db: tuple[DurstDB, dict]):
+        """Test that rebuilt balances match the incrementally maintained ones."""
+        db, data = populated_db
+        db.add_purchase("Bob", "Cola")
+        db.add_purchase("Charlie", "Sprite")
+        db.add_purchase("Alice", "Fanta")
+        db.add_repayment(data["users"]["bob"], data["users"]["alice"], 1.0)
+        expected = {u.name: u.balance for u in db.get_all_users()}
+
+        with db._transaction() as con:
+            con.execute("UPDATE users SET balance_cents = 42")
+        db.recompute_balances_from_scratch()
+
+        balances = {u.name: u.balance for u in db.get_all_users()}
+        assert balances == pytest.approx(expected)
+
+    def test_half_cent_repayment_matches_rebuild(
+        self, populated_db: tuple[DurstDB, dict]
+    ):
+        """Test that a half-cent repayment rounds the same way as the rebuild."""
+        db, data = populated_db
+        db.add_repayment(data["users"]["bob"], data["users"]["alice"], 0.125)
+        cents = {u.name: u.balance_cents for u in db.get_all_users()}
+        assert (cents["Bob"], cents["Alice"]) == (13, -13)
+
+        db.recompute_balances_from_scratch()
+
+        assert {u.name: u.balance_cents for u in db.get_all_users()} == cents
+
+    def test_float_balances_converted_on_upgrade(
+        self, populated_db: tuple[DurstDB, dict]
+    ):
+        """Test that databases with the old REAL balance column get cents."""
+        db, _ = populated_db
+        db.add_purchase("Bob", "Cola")
+        db.add_purchase("Charlie", "Sprite")
+        with db._transaction() as con:
+            con.execute("DROP TRIGGER trg_purchase_settle")
+            con.execute("ALTER TABLE users ADD COLUMN balance REAL NOT NULL DEFAULT 0")
+            con.execute("UPDATE users SET balance = balance_cents / 100.0")
+            con.execute("ALTER TABLE users DROP COLUMN balance_cents")
+            con.execute("PRAGMA user_version = 0")
+
+        db.setup_database()
+        db.add_purchase("Bob", "Fanta")
+
+        cents = {u.name: u.balance_cents for u in db.get_all_users()}
+        assert cents == {"Alice": 405, "Bob": -280, "Charlie": -125}
+
     def test_get_user_debts(self, populated_db: tuple[DurstDB, dict]):
         """Test retrieving user debt summary."""
         db, _ = populated_db
@@ -403,6 +1028,129 @@ class TestDebtReporting:
         assert "Bob" in debtor_names
         assert "Charlie" in debtor_names
 
+    def test_debts_skip_own_and_free_drinks(self, populated_db: tuple[DurstDB, dict]):
+        """Test that buying from one's own or free stock creates no debt."""
+        db, data = populated_db
+        water_id = db.add_drink_type("Water", "Tap", verbose=False)
+        db.stock_new_drinks(
+            data["users"]["bob"], 0.0, [(water_id, 0.0, 5)], verbose=False
+        )
+
+        db.add_purchase("Alice", "Cola")
+        db.add_purchase("Charlie", "Water")
+
+        assert db.get_user_debts() == []
+
+    def test_debts_net_of_repayments(self, populated_db: tuple[DurstDB, dict]):
+        """Test that repayments reduce and eventually clear a debt."""
+        db, data = populated_db
+        bob_id, alice_id = data["users"]["bob"], data["users"]["alice"]
+        db.add_purchase("Bob", "Cola")
+        db.add_purchase("Bob", "Sprite")
+
+        db.add_repayment(bob_id, alice_id, 1.0)
+        (debt,) = db.get_user_debts()
+        assert debt["amount_owed"] == pytest.approx(1.75)
+
+        db.add_repayment(bob_id, alice_id, 1.75)
+        assert db.get_user_debts() == []
+
+    def test_overpayment_reverses_debt(self, populated_db: tuple[DurstDB, dict]):
+        """Test that paying back more than owed leaves the receiver in debt."""
+        db, data = populated_db
+        db.add_purchase("Bob", "Cola")
+
+        db.add_repayment(data["users"]["bob"], data["users"]["alice"], 2.0)
+
+        (debt,) = db.get_user_debts()
+        assert (debt["debtor_name"], debt["creditor_name"]) == ("Alice", "Bob")
+        assert debt["amount_owed"] == pytest.approx(0.5)
+
+    def test_opposite_debts_are_netted(self, populated_db: tuple[DurstDB, dict]):
+        """Test that debts in both directions between two users offset."""
+        db, data = populated_db
+        mate_id = db.add_drink_type("Mate", "Club", verbose=False)
+        db.stock_new_drinks(data["users"]["bob"], 2.0, [(mate_id, 2.0, 1)])
+        db.add_purchase("Alice", "Mate")
+        db.add_purchase("Bob", "Cola")
+
+        (debt,) = db.get_user_debts()
+        assert (debt["debtor_name"], debt["creditor_name"]) == ("Alice", "Bob")
+        assert debt["amount_owed"] == pytest.approx(0.5)
+
+    def test_recompute_rebuilds_debts(self, populated_db: tuple[DurstDB, dict]):
+        """Test that the pairwise debts are rebuilt from the history."""
+        db, data = populated_db
+        db.add_purchase("Bob", "Cola")
+        db.add_purchase("Charlie", "Sprite")
+        db.add_repayment(data["users"]["charlie"], data["users"]["alice"], 0.25)
+        expected = db.get_user_debts()
+
+        with db._transaction() as con:
+            con.execute("DELETE FROM user_balances")
+        db.recompute_balances_from_scratch()
+
+        assert db.get_user_debts() == expected
+
+    def test_dashboard_snapshot(self, populated_db: tuple[DurstDB, dict]):
+        """Test that the snapshot matches the individual reports."""
+        db, _ = populated_db
+        db.add_purchase("Bob", "Cola")
+        db.add_purchase("Charlie", "Sprite")
+
+        snapshot = db.get_dashboard_snapshot(limit=10)
+
+        assert snapshot.recent_purchases == db.get_recent_purchases_raw(10)[1]
+        assert snapshot.stock == db.get_stock_status()
+        assert snapshot.users == db.get_all_users()
+        assert snapshot.debts == db.get_user_debts()
+
+    def test_dashboard_snapshot_in_transaction(
+        self, populated_db: tuple[DurstDB, dict]
+    ):
+        """Test that a snapshot taken inside a transaction sees its writes."""
+        db, _ = populated_db
+
+        with db.bulk():
+            db.add_purchase("Bob", "Cola")
+            snapshot = db.get_dashboard_snapshot()
+
+        assert len(snapshot.recent_purchases) == 1
+
+    def test_bulk_seed(self, temp_db: DurstDB):
+        """Test loading the full workflow's data set in one call."""
+        temp_db.bulk_seed(
+            users=[
+                ("Alice", "alice@example.com"),
+                ("Bob", "bob@example.com"),
+                ("Charlie", "charlie@example.com"),
+            ],
+            drink_types=[("Cola", "CocaCola"), ("Sprite", "CocaCola")],
+            orders=[("Alice", [("Cola", 1.50, 24), ("Sprite", 1.25, 12)])],
+            purchases=[("Bob", "Cola"), ("Bob", "Sprite"), ("Charlie", "Cola")],
+            repayments=[("Bob", "Alice", 2.00)],
+        )
+
+        cents = {u.name: u.balance_cents for u in temp_db.get_all_users()}
+        assert cents == {"Alice": 225, "Bob": -75, "Charlie": -150}
+        stock = temp_db.get_stock_status_by_name()
+        assert stock["Cola"]["total_remaining"] == 22
+        assert stock["Sprite"]["total_remaining"] == 11
+
+    def test_bulk_seed_is_atomic(self, temp_db: DurstDB):
+        """Test that a bad name rolls back everything seeded so far."""
+        with pytest.raises(ValueError, match="Name not found: Nobody"):
+            temp_db.bulk_seed(
+                users=[("Alice", "alice@example.com")],
+                drink_types=[("Cola", "CocaCola")],
+                orders=[("Alice", [("Cola", 1.50, 24)])],
+                purchases=[],
+                repayments=[("Nobody", "Alice", 1.00)],
+            )
+
+        assert temp_db.get_all_users() == []
+        assert temp_db.get_all_drink_types() == []
+
     def test_full_workflow(self, temp_db: DurstDB):
         """Test a complete workflow from setup to final balances."""
         db = temp_db
@@ -421,8 +1169,8 @@ class TestDebtReporting:
 
         # 3. Stock drinks
         order_items = [
-            {"drink_type_id": cola_id, "cost_per_item": 1.50, "quantity": 24},
-            {"drink_type_id": sprite_id, "cost_per_item": 1.25, "quantity": 12},
+            (cola_id, 1.50, 24),
+            (sprite_id, 1.25, 12),
         ]
         total_cost = (1.50 * 24) + (1.25 * 12)
         db.stock_new_drinks(alice_id, total_cost, order_items, verbose=False)
@@ -433,34 +1181,28 @@ class TestDebtReporting:
         db.add_purchase("Charlie", "Cola")
 
         # 5. Check balances before repayment
-        bob = db.get_user_by_name("Bob")
-        assert bob is not None, "Failed to retrieve Bob."
-        charlie = db.get_user_by_name("Charlie")
-        assert charlie is not None, "Failed to retrieve Charlie."
-        alice = db.get_user_by_name("Alice")
-        assert alice is not None, "Failed to retrieve Alice."
+        users = db.get_users_by_names(["Alice", "Bob", "Charlie"])
+        alice, bob, charlie = users["Alice"], users["Bob"], users["Charlie"]
 
         assert bob.is_in_debt()
         assert charlie.is_in_debt()
         assert alice.is_owed()
 
         # Bob owes: $1.50 + $1.25 = $2.75
-        assert abs(bob.balance - (-2.75)) < 0.01
+        assert bob.balance_cents == -275
         # Charlie owes: $1.50
-        assert abs(charlie.balance - (-1.50)) < 0.01
+        assert charlie.balance_cents == -150
         # Alice is owed: $2.75 + $1.50 = $4.25
-        assert abs(alice.balance - 4.25) < 0.01
+        assert alice.balance_cents == 425
 
         # 6. Bob pays Alice partially
         db.add_repayment(bob_id, alice_id, 2.00)
 
         # 7. Check final balances
-        bob = db.get_user_by_name("Bob")
-        assert bob is not None, "Failed to retrieve Bob."
-        alice = db.get_user_by_name("Alice")
-        assert alice is not None, "Failed to retrieve Alice."
+        users = db.get_users_by_names(["Alice", "Bob"])
+        alice, bob = users["Alice"], users["Bob"]
 
         # Bob now owes: -$2.75 + $2.00 = -$0.75
-        assert abs(bob.balance - (-0.75)) < 0.01
+        assert bob.balance_cents == -75
         # Alice is now owed: $4.25 - $2.00 = $2.25
-        assert abs(alice.balance - 2.25) < 0.01
+        assert alice.balance_cents == 225
@@ -1,6 +1,6 @@
 import asyncio
-import os
-import tempfile
+import sqlite3
+from contextlib import closing
 
 import pytest
 
@@ -11,30 +11,26 @@ from durst.tui import AddUserScreen, BuyScreen, DurstApp
 
 
 @pytest.fixture
-def db_path():
+def db_path(tmp_path):
     """Create a temporary database file path for testing."""
-    fd, path = tempfile.mkstemp(suffix=".db")
-    os.close(fd)
-    yield path
-    if os.path.exists(path):
-        os.remove(path)
+    return str(tmp_path / "durst.db")
 
 
 @pytest.fixture
 def populated_db_path(db_path: str):
     """A database file with users, drinks, stock, and one purchase."""
-    db = DurstDB(db_file=db_path)
-    alice = db.add_user("Alice", "alice@example.com", verbose=False)
-    db.add_user("Bob", "bob@example.com", verbose=False)
-    cola = db.add_drink_type("Cola", "CocaCola", verbose=False)
-    assert alice is not None and cola is not None
-    db.stock_new_drinks(
-        alice,
-        36.0,
-        [{"drink_type_id": cola, "cost_per_item": 1.50, "quantity": 24}],
-        verbose=False,
-    )
-    db.add_purchase("Bob", "Cola")
+    with closing(DurstDB(db_file=db_path)) as db:
+        alice = db.add_user("Alice", "alice@example.com", verbose=False)
+        db.add_user("Bob", "bob@example.com", verbose=False)
+        cola = db.add_drink_type("Cola", "CocaCola", verbose=False)
+        assert alice is not None and cola is not None
+        db.stock_new_drinks(
+            alice,
+            36.0,
+            [(cola, 1.50, 24)],
+            verbose=False,
+        )
+        db.add_purchase("Bob", "Cola")
     return db_path
 
 
@@ -70,6 +66,17 @@ class TestEmptyDatabase:
 
         asyncio.run(run())
 
+    def test_open_error_is_not_masked(self, tmp_path):
+        """A database that fails to open should surface its own error."""
+
+        async def run() -> None:
+            app = DurstApp(db_file=str(tmp_path / "missing" / "durst.db"))
+            async with app.run_test() as pilot:
+                await pilot.pause()
+
+        with pytest.raises(sqlite3.OperationalError):
+            asyncio.run(run())
+
 
 class TestPopulatedDatabase:
     def test_tables_show_data(self, populated_db_path: str):
@@ -111,10 +118,10 @@ class TestPopulatedDatabase:
                 await pilot.pause()
                 assert app.query_one("#purchases-table", DataTable).row_count == 2
 
-            db = DurstDB(db_file=populated_db_path)
-            bob = db.get_user_by_name("Bob")
+            with closing(DurstDB(db_file=populated_db_path)) as db:
+                bob = db.get_user_by_name("Bob")
             assert bob is not None
-            assert abs(bob.balance - (-3.00)) < 0.01
+            assert bob.balance_cents == -300
 
         asyncio.run(run())
 
@@ -132,8 +139,8 @@ class TestPopulatedDatabase:
                 await pilot.pause()
                 assert app.query_one("#balances-table", DataTable).row_count == 3
 
-            db = DurstDB(db_file=populated_db_path)
-            assert db.get_user_by_name("Charlie") is not None
+            with closing(DurstDB(db_file=populated_db_path)) as db:
+                assert db.get_user_by_name("Charlie") is not None
 
         asyncio.run(run())
 
@@ -160,10 +167,13 @@ class TestPopulatedDatabase:
             async with app.run_test() as pilot:
                 await pilot.pause()
                 # Add data behind the app's back, then refresh.
-                db = DurstDB(db_file=populated_db_path)
-                db.add_purchase("Bob", "Cola")
+                with closing(DurstDB(db_file=populated_db_path)) as db:
+                    db.add_purchase("Bob", "Cola")
                 await pilot.press("r")
                 await pilot.pause()
-                assert app.query_one("#purchases-table", DataTable).row_count == 2
+                table = app.query_one("#purchases-table", DataTable)
+                assert table.row_count == 2
+                # Refreshing replaces rows but never re-adds the columns.
+                assert len(table.columns) == 6
 
         asyncio.run(run())